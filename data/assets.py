@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+import argparse
+import shlex
+import sys
+import time
+
+_START = time.perf_counter()
+
+###############################################################################
+# One entry point for all asset tools:
+#
+#   python assets.py slice butterfly.png suruvaippa 40 60 auto
+#   python assets.py combine suruvaippa --indexed
+#   python assets.py --preset max run pipeline.txt
+#
+# Only argparse and the standard library are imported at startup. Each
+# subcommand imports its tool module (and with it Pillow, NumPy,
+# svgpathtools or BeautifulSoup) when it actually runs.
+#
+# A pipeline file holds one subcommand per line, '#' starts a comment:
+#
+#   slice src/suruvaippa.png suruvaippa 40 60 auto
+#   combine suruvaippa --indexed
+#   swirl bubbleA1.png popA1
+#   combine popA1 --animation-name pop --json popA1_sprites.json --frame-prefix "" --animation-frames 01-break,02-break,03-break,04-break,05-break,06-break,07-break,08-break,09-break,10-break
+###############################################################################
+
+
+def make_writer(args, webp=False):
+    """ImageWriter configured by the global --preset and --workers options."""
+    from writer import ImageWriter
+
+    return ImageWriter(preset=args.preset or "default",
+                       image_format="webp" if webp else None,
+                       workers=args.workers, report=True)
+
+
+def run_slice(args):
+    from slice import resolve_max_wing_width, slice_and_resize_butterfly
+
+    max_wing_width = resolve_max_wing_width(
+        args.max_wing_width, args.input_file, args.body_width, args.min_wing_width)
+
+    with make_writer(args) as writer:
+        slice_and_resize_butterfly(
+            input_path=args.input_file,
+            body_width=args.body_width,
+            min_wing_width=args.min_wing_width,
+            max_wing_width=max_wing_width,
+            output_dir=args.output_folder,
+            mirror_wings=args.mirror_wings,
+            writer=writer,
+        )
+
+
+def run_swirl(args):
+    import os
+    from swirl import create_burst_sprites
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    with make_writer(args) as writer:
+        create_burst_sprites(
+            input_image_path=args.input_image_path,
+            output_folder=args.output_folder,
+            output_prefix="break",
+            frames=args.frames,
+            swirl_strength=args.swirl_strength,
+            num_drops=args.drops,
+            writer=writer,
+        )
+
+
+def run_warp(args):
+    from swirl import swirl_large_image
+
+    with make_writer(args, webp=args.webp) as writer:
+        swirl_large_image(args.input_file, args.output_file, args.swirl_strength,
+                          three_centers=not args.single_center,
+                          tile_size=args.tile_size, workers=args.workers,
+                          writer=writer)
+
+
+def run_combine(args):
+    from combine import create_spritesheet
+
+    with make_writer(args, webp=args.webp) as writer:
+        create_spritesheet(args.input_image_path, animation_frames=args.animation_frames,
+                           indexed=args.indexed, num_colors=args.colors,
+                           compact=args.compact, collision=args.collision,
+                           writer=writer, animation_name=args.animation_name,
+                           json_path=args.json, frame_prefix=args.frame_prefix)
+
+
+def run_resize(args):
+    from resize import resize_to_width
+
+    with make_writer(args) as writer:
+        resize_to_width(args.input_file, args.output_file, new_width=args.width, writer=writer)
+
+
+def run_flatten(args):
+    import os
+    from flatten_svg import flatten_svg_transforms
+
+    base, ext = os.path.splitext(args.infile)
+    outfile = args.outfile or base + "_flat" + ext
+    flatten_svg_transforms(args.infile, outfile)
+    print(f"Done. Wrote flattened SVG to: {outfile}")
+
+
+def run_extract(args):
+    from extract_svgs import extract_svgs
+
+    extract_svgs(args.html_file, args.output_dir)
+
+
+def run_texture(args):
+    from texture_compress import compress_spritesheet
+
+    for input_file in args.input_files:
+        compress_spritesheet(input_file, fmt=args.format, container=args.container)
+
+
+def run_watch(args):
+    from watch import watch
+
+    try:
+        watch(args.config, args.interval, args.debounce,
+              initial_build=not args.no_initial_build,
+              preset=args.preset or "fast", workers=args.workers)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_budget(args):
+    from budget import budget
+
+    if not budget(args.public_dir, args.json, args.quantize, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+def run_pipeline(args):
+    """Run every line of a pipeline file as a subcommand in this process."""
+    with open(args.pipeline_file, encoding="utf-8") as f:
+        lines = f.readlines()
+
+    parser = build_parser()
+    for line_number, line in enumerate(lines, start=1):
+        argv = shlex.split(line, comments=True)
+        if not argv:
+            continue
+        if argv[0] == "run":
+            raise ValueError(f"{args.pipeline_file}:{line_number}: pipelines cannot be nested.")
+
+        step_args = parser.parse_args(argv)
+        # Global options of the 'run' command apply to every step
+        step_args.preset = step_args.preset or args.preset
+        step_args.workers = step_args.workers or args.workers
+        start = time.perf_counter()
+        step_args.func(step_args)
+        if args.timings:
+            print(f"[{time.perf_counter() - start:.3f}s] {line.strip()}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Butterfly asset tools: slicing, swirling, spritesheets and SVG helpers.")
+    parser.add_argument("--timings", action="store_true",
+                        help="Print startup time and the time of each step.")
+    parser.add_argument("--preset", choices=["fast", "default", "max"], default=None,
+                        help="Image encoding preset: fast for iteration, max for release.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Threads for encoding and tiled warps (default: number of CPUs).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("slice", help="Slice a butterfly into wing-width frames.")
+    p.add_argument("input_file", help="Path to the input PNG file.")
+    p.add_argument("output_folder", help="Directory to save the output images.")
+    p.add_argument("body_width", type=int, help="Body width in pixels.")
+    p.add_argument("min_wing_width", type=int, help="Minimum wing width in pixels.")
+    p.add_argument("max_wing_width",
+                   help="Maximum wing width in pixels, or 'auto' for (image.width / 2) - body_width.")
+    p.add_argument("--mirror-wings", action="store_true", default=None,
+                   help="Mirror the left wing as the right wing.")
+    p.set_defaults(func=run_slice)
+
+    p = subparsers.add_parser("swirl", help="Create bubble burst frames.")
+    p.add_argument("input_image_path", help="Bubble image.")
+    p.add_argument("output_folder", help="Directory for the frames.")
+    p.add_argument("--frames", type=int, default=10)
+    p.add_argument("--swirl-strength", type=float, default=1.28)
+    p.add_argument("--drops", type=int, default=5, help="Number of water drops.")
+    p.set_defaults(func=run_swirl)
+
+    p = subparsers.add_parser("warp", help="Swirl a large image tile by tile.")
+    p.add_argument("input_file", help="Input image, or .npy to memory-map it.")
+    p.add_argument("output_file", help="Output image, or .npy to memory-map it.")
+    p.add_argument("--swirl-strength", type=float, default=1.28)
+    p.add_argument("--single-center", action="store_true",
+                   help="Swirl around the image center instead of three centers.")
+    p.add_argument("--tile-size", type=int, default=512)
+    p.add_argument("--webp", action="store_true", help="Write lossless WebP instead of PNG.")
+    p.set_defaults(func=run_warp)
+
+    p = subparsers.add_parser("combine", help="Combine a folder of frames into a spritesheet.")
+    p.add_argument("input_image_path", help="Folder with the frame PNG files.")
+    p.add_argument("--indexed", action="store_true",
+                   help="Write an indexed PNG with one shared RGBA palette.")
+    p.add_argument("--colors", type=int, default=256,
+                   help="Palette size for --indexed (2-256).")
+    p.add_argument("--compact", action="store_true",
+                   help="Also write minified JSON and a binary .atlas index.")
+    p.add_argument("--collision", action="store_true",
+                   help="Add collision masks, hulls and circles to the frame data.")
+    p.add_argument("--animation-frames", default="01,02,03,04,05,06,07,06,04,02",
+                   help="Comma separated frame names (without .png) of the animation.")
+    p.add_argument("--animation-name", default="fly",
+                   help="Name of the animation in the metadata.")
+    p.add_argument("--frame-prefix",
+                   help="Prefix of the frame names in the metadata (default: <folder>_).")
+    p.add_argument("--json", help="Metadata path (default: <folder>.json).")
+    p.add_argument("--webp", action="store_true",
+                   help="Write the sheet as lossless WebP instead of PNG.")
+    p.set_defaults(func=run_combine)
+
+    p = subparsers.add_parser("resize", help="Resize an image to a given width.")
+    p.add_argument("input_file")
+    p.add_argument("output_file")
+    p.add_argument("--width", type=int, default=800)
+    p.set_defaults(func=run_resize)
+
+    p = subparsers.add_parser("flatten", help="Flatten SVG transforms into paths.")
+    p.add_argument("infile", help="Input SVG file.")
+    p.add_argument("outfile", nargs="?", help="Output SVG file (default <infile>_flat.svg).")
+    p.set_defaults(func=run_flatten)
+
+    p = subparsers.add_parser("extract", help="Extract the SVGs of an HTML page into files.")
+    p.add_argument("html_file", nargs="?",
+                   help="HTML page (default: flowers.html in the Next.js public folder).")
+    p.add_argument("output_dir", nargs="?", help="Output folder (default: svgs next to the page).")
+    p.set_defaults(func=run_extract)
+
+    p = subparsers.add_parser("texture", help="Block-compress spritesheets to DDS or KTX.")
+    p.add_argument("input_files", nargs="+", help="Spritesheet PNG files.")
+    p.add_argument("--format", choices=["bc1", "bc3", "etc2"], default="bc3",
+                   help="etc2 (RGBA8 with EAC alpha) needs --container ktx.")
+    p.add_argument("--container", choices=["dds", "ktx"], default="dds")
+    p.set_defaults(func=run_texture)
+
+    p = subparsers.add_parser("budget", help="Report GPU memory and waste of the spritesheets.")
+    p.add_argument("public_dir", nargs="?", default="../nextjs-butterfly/public")
+    p.add_argument("--json", help="Write the report as JSON to this file.")
+    p.add_argument("--quantize", action="store_true",
+                   help="Also measure the indexed PNG size of every sheet (slow).")
+    p.add_argument("--baseline", help="Earlier JSON report to check for regressions.")
+    p.add_argument("--tolerance", type=float, default=0.0)
+    p.set_defaults(func=run_budget)
+
+    p = subparsers.add_parser("watch", help="Rebuild spritesheets when their sources change.")
+    p.add_argument("config", help="JSON file listing butterflies, bubbles and sheets.")
+    p.add_argument("--interval", type=float, default=0.2)
+    p.add_argument("--debounce", type=float, default=0.3)
+    p.add_argument("--no-initial-build", action="store_true")
+    p.set_defaults(func=run_watch)
+
+    p = subparsers.add_parser("run", help="Run a pipeline file of subcommands in one process.")
+    p.add_argument("pipeline_file")
+    p.set_defaults(func=run_pipeline)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.timings:
+        print(f"Startup took {(time.perf_counter() - _START) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    args.func(args)
+    if args.timings:
+        print(f"{args.command} took {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import json
+import struct
+
+###############################################################################
+# Compact spritesheet metadata, written next to the regular JSON:
+#
+#   <name>.min.json  PIXI-compatible JSON without whitespace and without the
+#                    per-frame fields PIXI defaults anyway (rotated, trimmed,
+#                    spriteSourceSize, sourceSize for untrimmed frames).
+#   <name>.atlas     Little-endian binary table, all sections 4-byte aligned:
+#
+#     header   magic "BFAT", u16 version, u16 reserved,
+#              u32 sheet width, u32 sheet height,
+#              u32 frame count, u32 animation count          (24 bytes)
+#     frames   per frame: u16 x, y, w, h; f32 u0, v0, u1, v1 (24 bytes)
+#     anims    per animation: u16 name length, u16 frame count,
+#              name (utf-8), u16 frame indices, zero padding to 4 bytes
+#     names    per frame: u16 name length, name (utf-8), padded to 4 bytes
+###############################################################################
+
+MAGIC = b"BFAT"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHHIIII")
+_FRAME = struct.Struct("<4H4f")
+
+
+def _padding(length):
+    return b"\x00" * ((-length) % 4)
+
+
+def _string_entry(text, *counts):
+    """u16 length (+ extra u16 counts) followed by the utf-8 text."""
+    encoded = text.encode("utf-8")
+    return struct.pack(f"<{1 + len(counts)}H", len(encoded), *counts) + encoded
+
+
+def minify_frames(frames):
+    """Drop the frame fields that only repeat PIXI's defaults."""
+    minified = {}
+    for name, data in frames.items():
+        frame = data["frame"]
+        entry = {"frame": frame}
+        if data.get("rotated"):
+            entry["rotated"] = True
+        if data.get("trimmed"):
+            entry["trimmed"] = True
+            entry["spriteSourceSize"] = data["spriteSourceSize"]
+            entry["sourceSize"] = data["sourceSize"]
+        for key, value in data.items():
+            # Keep any extra per-frame data (e.g. collision shapes)
+            if key not in ("frame", "rotated", "trimmed", "spriteSourceSize", "sourceSize"):
+                entry[key] = value
+        minified[name] = entry
+    return minified
+
+
+def write_minified_json(path, spritesheet_data):
+    data = dict(spritesheet_data, frames=minify_frames(spritesheet_data["frames"]))
+    with open(path, "w") as json_file:
+        json.dump(data, json_file, separators=(",", ":"))
+
+
+def encode_binary_atlas(spritesheet_data):
+    """
+    Pack frame rects, normalized UVs and animation index lists into bytes.
+    Animation entries naming a frame that is not in the sheet are left out
+    with a warning (the JSON keeps them as they are).
+    """
+    size = spritesheet_data["meta"]["size"]
+    sheet_w, sheet_h = size["w"], size["h"]
+    frames = spritesheet_data["frames"]
+    animations = spritesheet_data.get("animations", {})
+
+    names = list(frames)
+    index_of = {name: i for i, name in enumerate(names)}
+
+    parts = [_HEADER.pack(MAGIC, VERSION, 0, sheet_w, sheet_h, len(names), len(animations))]
+
+    for name in names:
+        rect = frames[name]["frame"]
+        x, y, w, h = rect["x"], rect["y"], rect["w"], rect["h"]
+        parts.append(_FRAME.pack(x, y, w, h,
+                                 x / sheet_w, y / sheet_h,
+                                 (x + w) / sheet_w, (y + h) / sheet_h))
+
+    for anim_name, frame_names in animations.items():
+        missing = [frame_name for frame_name in frame_names if frame_name not in index_of]
+        if missing:
+            print(f"Warning: animation '{anim_name}' names frames that are not in the "
+                  f"sheet, left out of the atlas: {', '.join(sorted(set(missing)))}")
+        indices = [index_of[frame_name] for frame_name in frame_names if frame_name in index_of]
+        entry = _string_entry(anim_name, len(indices))
+        entry += _padding(len(entry))
+        entry += struct.pack(f"<{len(indices)}H", *indices)
+        parts.append(entry + _padding(len(entry)))
+
+    for name in names:
+        entry = _string_entry(name)
+        parts.append(entry + _padding(len(entry)))
+
+    return b"".join(parts)
+
+
+def write_binary_atlas(path, spritesheet_data):
+    # Encode before opening, so a failure does not leave a truncated file
+    data = encode_binary_atlas(spritesheet_data)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def decode_binary_atlas(data):
+    """
+    Read a .atlas file back into a dict with 'size', 'frames' (list of
+    (name, (x, y, w, h), (u0, v0, u1, v1))) and 'animations'.
+    """
+    magic, version, _, sheet_w, sheet_h, frame_count, anim_count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a binary atlas file.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported atlas version {version}.")
+
+    offset = _HEADER.size
+    rects = []
+    for _ in range(frame_count):
+        values = _FRAME.unpack_from(data, offset)
+        rects.append((values[:4], values[4:]))
+        offset += _FRAME.size
+
+    def read_string(offset, extra=0):
+        counts = struct.unpack_from(f"<{1 + extra}H", data, offset)
+        start = offset + 2 * (1 + extra)
+        text = data[start:start + counts[0]].decode("utf-8")
+        end = start + counts[0]
+        return text, counts[1:], end + (-end) % 4
+
+    animations = {}
+    for _ in range(anim_count):
+        anim_name, (count,), offset = read_string(offset, extra=1)
+        indices = struct.unpack_from(f"<{count}H", data, offset)
+        offset += 2 * count
+        offset += (-offset) % 4
+        animations[anim_name] = list(indices)
+
+    frames = []
+    for rect, uv in rects:
+        name, _, offset = read_string(offset)
+        frames.append((name, rect, uv))
+
+    return {"size": (sheet_w, sheet_h), "frames": frames, "animations": animations}
+
+
+def read_binary_atlas(path):
+    with open(path, "rb") as f:
+        return decode_binary_atlas(f.read())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import numpy as np
+from PIL import Image
+
+###############################################################################
+# Texture budget report for the shipped spritesheets. Every JSON file with
+# "frames" and a "meta.image" under the public folder is treated as a sheet;
+# its image is meta.image next to the JSON. Other JSON files with frames,
+# e.g. TexturePacker multi-image files with meta.images, are skipped and
+# listed. Per sheet the report lists:
+#
+#   png_bytes / json_bytes   size on disk
+#   gpu_bytes                decoded RGBA8 size in GPU memory (w * h * 4)
+#   bc3_gpu_bytes            the same texture block-compressed (8 bpp)
+#   transparent_ratio        share of pixels with alpha == 0
+#   duplicate_frames         groups of frame names with identical pixels
+#   unused_frames            frames not referenced by any animation
+#   trim_savings_bytes       GPU bytes saved by trimming transparent borders,
+#                            dropping unused frames and duplicate copies
+#   quantized_png_bytes      indexed PNG size (only with --quantize)
+#
+# With --json the report is written as JSON, and --baseline compares it to
+# an earlier report and exits with status 1 when a sheet or the totals grew,
+# or a sheet is new or newly broken, so it can gate asset size regressions.
+###############################################################################
+
+
+def find_sheets(public_dir):
+    """
+    Paths of the JSON files under public_dir that describe a spritesheet
+    backed by one image, and paths of the other JSON files with frames and
+    meta that are skipped, as (sheets, skipped).
+    """
+    sheets = []
+    skipped = []
+    for path in sorted(glob.glob(os.path.join(public_dir, "**", "*.json"), recursive=True)):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not (isinstance(data, dict) and "frames" in data and "meta" in data):
+            continue
+        if isinstance(data["meta"], dict) and isinstance(data["meta"].get("image"), str):
+            sheets.append(path)
+        else:
+            skipped.append(path)
+    return sheets, skipped
+
+
+def _frame_rects(data):
+    for name, frame in data["frames"].items():
+        rect = frame["frame"]
+        yield name, rect["x"], rect["y"], rect["w"], rect["h"]
+
+
+def analyze_sheet(json_path, quantize=False):
+    """Budget figures for one sheet as a JSON-ready dict."""
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    report = {
+        "json": json_path,
+        "json_bytes": os.path.getsize(json_path),
+    }
+
+    image_name = data["meta"].get("image")
+    image_path = os.path.join(os.path.dirname(json_path), image_name) if image_name else None
+    if image_path is None or not os.path.exists(image_path):
+        report["error"] = f"image {image_name!r} not found"
+        return report
+
+    with Image.open(image_path) as img:
+        pixels = np.asarray(img.convert("RGBA"))
+    height, width = pixels.shape[:2]
+    alpha = pixels[..., 3]
+
+    report.update({
+        "image": image_path,
+        "png_bytes": os.path.getsize(image_path),
+        "width": width,
+        "height": height,
+        "gpu_bytes": width * height * 4,
+        "bc3_gpu_bytes": ((width + 3) // 4) * ((height + 3) // 4) * 16,
+        "transparent_ratio": round(float((alpha == 0).mean()), 4),
+    })
+
+    # Duplicates by pixel hash, trimmed areas from the alpha bounding boxes
+    by_hash = {}
+    trimmed_area = {}
+    frame_area = {}
+    for name, x, y, w, h in _frame_rects(data):
+        frame = pixels[y:y + h, x:x + w]
+        by_hash.setdefault(hashlib.sha1(frame.tobytes()).hexdigest(), []).append(name)
+
+        solid = frame[..., 3] > 0
+        rows = np.flatnonzero(solid.any(axis=1))
+        cols = np.flatnonzero(solid.any(axis=0))
+        frame_area[name] = w * h
+        trimmed_area[name] = (0 if len(rows) == 0 else
+                              (rows[-1] - rows[0] + 1) * (cols[-1] - cols[0] + 1))
+
+    duplicates = [names for names in by_hash.values() if len(names) > 1]
+    referenced = {name for names in data.get("animations", {}).values() for name in names}
+    unused = [name for name in data["frames"] if name not in referenced]
+
+    # Frames that would remain: used ones, one copy per duplicate group
+    dropped = set(unused)
+    for names in duplicates:
+        dropped.update(names[1:])
+    kept_area = sum(int(trimmed_area[name]) for name in data["frames"] if name not in dropped)
+
+    report.update({
+        "frame_count": len(data["frames"]),
+        "duplicate_frames": duplicates,
+        "unused_frames": unused,
+        "trim_savings_bytes": int(sum(frame_area.values()) - kept_area) * 4,
+    })
+
+    if quantize:
+        from quantize import quantize_image
+
+        indexed, quality = quantize_image(Image.fromarray(pixels))
+        buffer = io.BytesIO()
+        indexed.save(buffer, format="PNG", optimize=True)
+        report["quantized_png_bytes"] = buffer.tell()
+        report["quantized_psnr"] = round(quality, 2)
+
+    return report
+
+
+def compare_to_baseline(reports, baseline, tolerance=0.0):
+    """
+    Messages for every sheet whose png_bytes or gpu_bytes grew by more than
+    `tolerance` (a fraction) compared to the baseline report, for sheets
+    that are new, that could not be analyzed unless they already failed in
+    the baseline, and for growth of the totals.
+    """
+    previous = {sheet["sheet"]: sheet for sheet in baseline["sheets"]}
+    regressions = []
+    for sheet in reports:
+        name = sheet["sheet"]
+        before = previous.get(name)
+        if "error" in sheet:
+            if before is None or "error" not in before:
+                regressions.append(f"{name}: {sheet['error']}")
+            continue
+        if before is None:
+            regressions.append(f"{name}: new sheet, png_bytes {sheet['png_bytes']}, "
+                               f"gpu_bytes {sheet['gpu_bytes']}")
+            continue
+        for key in ("png_bytes", "gpu_bytes"):
+            if key in before and sheet[key] > before[key] * (1.0 + tolerance):
+                regressions.append(f"{name}: {key} {before[key]} -> {sheet[key]}")
+
+    for key in ("png_bytes", "gpu_bytes"):
+        total = sum(sheet.get(key, 0) for sheet in reports)
+        total_before = baseline.get(f"total_{key}")
+        if total_before is not None and total > total_before * (1.0 + tolerance):
+            regressions.append(f"total {key} {total_before} -> {total}")
+    return regressions
+
+
+def print_table(reports):
+    print(f"{'sheet':<36} {'png kB':>8} {'gpu kB':>8} {'bc3 kB':>8} {'transp':>7} "
+          f"{'dup':>4} {'unused':>6} {'trim kB':>8}")
+    for sheet in reports:
+        name = sheet["sheet"]
+        if "error" in sheet:
+            print(f"{name:<36} {sheet['error']}")
+            continue
+        print(f"{name:<36} {sheet['png_bytes'] / 1024:8.0f} {sheet['gpu_bytes'] / 1024:8.0f} "
+              f"{sheet['bc3_gpu_bytes'] / 1024:8.0f} {sheet['transparent_ratio']:7.1%} "
+              f"{sum(len(n) - 1 for n in sheet['duplicate_frames']):4d} "
+              f"{len(sheet['unused_frames']):6d} {sheet['trim_savings_bytes'] / 1024:8.0f}")
+
+
+def budget(public_dir, json_path=None, quantize=False, baseline=None, tolerance=0.0):
+    """
+    Print the report for every sheet under public_dir, optionally save it as
+    JSON and compare it to a baseline. Returns False on a regression.
+    """
+    sheets, skipped = find_sheets(public_dir)
+    reports = []
+    for path in sheets:
+        report = analyze_sheet(path, quantize=quantize)
+        # Relative name, so reports from different checkouts can be compared
+        report["sheet"] = os.path.relpath(path, public_dir).replace(os.sep, "/")
+        reports.append(report)
+    print_table(reports)
+    # Relative names like the sheets
+    skipped = [os.path.relpath(path, public_dir).replace(os.sep, "/") for path in skipped]
+    for name in skipped:
+        print(f"Skipped {name}: not backed by a single meta.image")
+
+    total_gpu = sum(sheet.get("gpu_bytes", 0) for sheet in reports)
+    total_png = sum(sheet.get("png_bytes", 0) for sheet in reports)
+    print(f"Total: {total_png / 1024 / 1024:.1f} MB PNG, {total_gpu / 1024 / 1024:.1f} MB GPU")
+
+    if json_path:
+        with open(json_path, "w") as json_file:
+            json.dump({"sheets": reports, "skipped": skipped, "total_png_bytes": total_png,
+                       "total_gpu_bytes": total_gpu}, json_file, indent=4)
+        print(f"Report saved as {json_path}")
+
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(reports, json.load(f), tolerance)
+        for message in regressions:
+            print(f"Regression: {message}")
+        return not regressions
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Reports GPU memory, transparency and wasted frames of the spritesheets.")
+    parser.add_argument("public_dir", nargs="?", default="../nextjs-butterfly/public",
+                        help="Folder searched for spritesheet JSON files.")
+    parser.add_argument("--json", help="Write the report as JSON to this file.")
+    parser.add_argument("--quantize", action="store_true",
+                        help="Also measure the indexed PNG size of every sheet (slow).")
+    parser.add_argument("--baseline", help="Earlier JSON report to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="Allowed growth over the baseline as a fraction, e.g. 0.05.")
+
+    args = parser.parse_args()
+    if not budget(args.public_dir, args.json, args.quantize, args.baseline, args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+import base64
+import math
+import random
+import numpy as np
+
+###############################################################################
+# Collision shapes from sprite alpha, stored per frame in the atlas JSON:
+#
+#   "collision": {
+#     "mask": {"w": 38, "h": 38, "scale": 4, "bits": "<base64>"},
+#     "hull": [[x, y], ...],            # convex hull, clockwise on screen
+#     "circle": {"x": 75.0, "y": 75.0, "r": 70.2}
+#   }
+#
+# Coordinates are in frame pixels. The mask has one bit per scale x scale
+# cell, rows packed MSB first and padded to whole bytes (numpy.packbits).
+# A cell is solid if any of its pixels is, so the mask never misses a hit.
+###############################################################################
+
+
+def alpha_mask(alpha, threshold=128):
+    """Boolean (H, W) mask of the pixels that count as solid."""
+    return alpha >= threshold
+
+
+def downsample_mask(mask, scale):
+    """Max-pool a boolean mask by scale x scale cells."""
+    height, width = mask.shape
+    pad_h = (-height) % scale
+    pad_w = (-width) % scale
+    if pad_h or pad_w:
+        mask = np.pad(mask, ((0, pad_h), (0, pad_w)))
+    h, w = mask.shape[0] // scale, mask.shape[1] // scale
+    return mask.reshape(h, scale, w, scale).any(axis=(1, 3))
+
+
+def pack_mask(mask):
+    """Bit-pack a boolean mask row by row and encode it as base64."""
+    return base64.b64encode(np.packbits(mask, axis=1).tobytes()).decode("ascii")
+
+
+def _row_extreme_corners(mask):
+    """
+    Corner points of the leftmost and rightmost solid pixel of every row.
+    Every other solid pixel lies inside their convex hull.
+    """
+    rows = np.flatnonzero(mask.any(axis=1))
+    if len(rows) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    solid = mask[rows]
+    left = solid.argmax(axis=1)
+    right = solid.shape[1] - 1 - solid[:, ::-1].argmax(axis=1)
+
+    xs = np.concatenate([left, left, right + 1, right + 1])
+    ys = np.concatenate([rows, rows + 1, rows, rows + 1])
+    return np.unique(np.stack([xs, ys], axis=1), axis=0)
+
+
+def convex_hull(points):
+    """Andrew's monotone chain on (N, 2) points sorted by x, then y."""
+    points = [tuple(p) for p in points.tolist()]
+    if len(points) < 3:
+        return points
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower = []
+    for p in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+
+    upper = []
+    for p in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+
+    return lower[:-1] + upper[:-1]
+
+
+def _circle_from(points):
+    """Smallest circle through 1, 2 or 3 points (x, y, r)."""
+    if len(points) == 1:
+        (x, y), = points
+        return x, y, 0.0
+    if len(points) == 2:
+        (ax, ay), (bx, by) = points
+        return (ax + bx) / 2.0, (ay + by) / 2.0, math.hypot(ax - bx, ay - by) / 2.0
+
+    (ax, ay), (bx, by), (cx, cy) = points
+    d = 2.0 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if d == 0:
+        # Collinear: the circle over the two farthest points covers all three
+        pairs = [(points[0], points[1]), (points[0], points[2]), (points[1], points[2])]
+        return max((_circle_from(list(pair)) for pair in pairs), key=lambda c: c[2])
+    ux = ((ax * ax + ay * ay) * (by - cy) + (bx * bx + by * by) * (cy - ay)
+          + (cx * cx + cy * cy) * (ay - by)) / d
+    uy = ((ax * ax + ay * ay) * (cx - bx) + (bx * bx + by * by) * (ax - cx)
+          + (cx * cx + cy * cy) * (bx - ax)) / d
+    return ux, uy, math.hypot(ax - ux, ay - uy)
+
+
+def minimum_enclosing_circle(points):
+    """Welzl's algorithm (iterative form) on a list of (x, y) points."""
+    points = list(points)
+    random.Random(0).shuffle(points)
+
+    def inside(circle, p):
+        return math.hypot(p[0] - circle[0], p[1] - circle[1]) <= circle[2] + 1e-7
+
+    circle = None
+    for i, p in enumerate(points):
+        if circle is not None and inside(circle, p):
+            continue
+        circle = (p[0], p[1], 0.0)
+        for j, q in enumerate(points[:i]):
+            if inside(circle, q):
+                continue
+            circle = _circle_from([p, q])
+            for r in points[:j]:
+                if not inside(circle, r):
+                    circle = _circle_from([p, q, r])
+    return circle
+
+
+def frame_collision(image, mask_scale=4, threshold=128):
+    """Collision data (mask, hull, circle) of one frame as a JSON-ready dict."""
+    alpha = np.asarray(image.convert("RGBA"))[..., 3]
+    mask = alpha_mask(alpha, threshold)
+
+    cells = downsample_mask(mask, mask_scale)
+    hull = convex_hull(_row_extreme_corners(mask))
+    circle = minimum_enclosing_circle(hull) if hull else None
+
+    return {
+        "mask": {"w": cells.shape[1], "h": cells.shape[0],
+                 "scale": mask_scale, "bits": pack_mask(cells)},
+        "hull": [list(p) for p in hull],
+        "circle": None if circle is None else {
+            "x": round(circle[0], 2), "y": round(circle[1], 2), "r": round(circle[2], 2)},
+    }
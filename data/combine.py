@@ -2,30 +2,74 @@ import os
 import json
 from PIL import Image
 
+from writer import use_writer
 
-def create_spritesheet(input_image_path='.', animation_frames='01,02,03,04,05,06,07,06,04,02'):
-    # Get all PNG files in the current folder
-    images = [f for f in os.listdir(input_image_path) if f.endswith('.png')]
-    images.sort()  # Sort files alphabetically
+
+def create_spritesheet(input_image_path='.', animation_frames='01,02,03,04,05,06,07,06,04,02',
+                       indexed=False, num_colors=256, compact=False, collision=False,
+                       writer=None, animation_name='fly', json_path=None, frame_prefix=None,
+                       images=None):
+    """
+    Stacks all PNG frames in input_image_path vertically into one spritesheet
+    and writes <input_image_path>.png and <input_image_path>.json.
+
+    The frames are keyed <frame_prefix><filename>, frame_prefix defaulting to
+    "<input_image_path>_", and animation_frames (comma separated, without
+    .png) become the animation animation_name. json_path overrides where the
+    metadata is written.
+
+    images, a dict of filename -> Image, stacks frames that are already in
+    memory (e.g. just written by slice or swirl) instead of reading the folder.
+
+    With indexed=True all frames are quantized to one shared RGBA palette of
+    num_colors entries and the sheet is written as an indexed PNG, recorded
+    as meta.format "INDEXED".
+
+    With compact=True a minified <input_image_path>.min.json and a binary
+    <input_image_path>.atlas index (see atlas.py) are written as well.
+
+    With collision=True every frame gets a "collision" entry with a packed
+    alpha mask, convex hull and bounding circle (see collision.py).
+
+    The sheet is encoded by writer (an ImageWriter, see writer.py), which also
+    decides the image format.
+    """
+    if frame_prefix is None:
+        frame_prefix = input_image_path+'_'
+
+    frames_in_memory = None
+    if images is not None:
+        frames_in_memory = images
+        images = sorted(frames_in_memory)
+    else:
+        # Get all PNG files in the current folder
+        images = [f for f in os.listdir(input_image_path) if f.endswith('.png')]
+        images.sort()  # Sort files alphabetically
 
     if not images:
         print("No PNG images found in the current directory.")
         return
 
     # Open images and calculate the total height and max width
-    opened_images = [Image.open(input_image_path+'/'+img) for img in images]
+    if frames_in_memory is not None:
+        opened_images = [frames_in_memory[img] for img in images]
+    else:
+        opened_images = [Image.open(input_image_path+'/'+img) for img in images]
     total_height = sum(img.height for img in opened_images)
     max_width = max(img.width for img in opened_images)
 
     # Create a blank image for the spritesheet
     spritesheet = Image.new('RGBA', (max_width, total_height))
 
+    if collision:
+        from collision import frame_collision
+
     # Paste images into the spritesheet
     y_offset = 0
     frame_data = {}
     for img, filename in zip(opened_images, images):
         spritesheet.paste(img, (0, y_offset))
-        unique_filename = input_image_path+'_'+filename
+        unique_filename = frame_prefix+filename
         frame_data[unique_filename] = {
             "frame": {"x": 0, "y": y_offset, "w": img.width, "h": img.height},
             "rotated": False,
@@ -33,47 +77,79 @@ def create_spritesheet(input_image_path='.', animation_frames='01,02,03,04,05,06
             "spriteSourceSize": {"x": 0, "y": 0, "w": img.width, "h": img.height},
             "sourceSize": {"w": img.width, "h": img.height}
         }
+        if collision:
+            frame_data[unique_filename]["collision"] = frame_collision(img)
         y_offset += img.height
 
     # Save the spritesheet image
-    spritesheet_filename = input_image_path+".png"
-    spritesheet.save(spritesheet_filename)
+    with use_writer(writer) as out:
+        if indexed:
+            # NumPy is only needed for the indexed output
+            from quantize import quantize_image
+            indexed_sheet, quality = quantize_image(spritesheet, num_colors)
+            spritesheet_filename = out.save(indexed_sheet, input_image_path+".png")
+            print(f"Quantized to {num_colors} colors, PSNR {quality:.2f} dB")
+        else:
+            spritesheet_filename = out.save(spritesheet, input_image_path+".png")
 
     # make a list from frame string, split by comma, and add .png to each frame
-    frame_names = [input_image_path + "_"+f +
+    frame_names = [frame_prefix+f +
                    ".png" for f in animation_frames.split(',')]
 
     # Create the spritesheet metadata
     spritesheet_data = {
         "frames": frame_data,
-        "animations": {"fly": frame_names},
+        "animations": {animation_name: frame_names},
         "meta": {
             "app": "https://chatgpt.com/",
             "version": "4",
             "image": spritesheet_filename,
-            "format": "RGBA8888",
+            "format": "INDEXED" if indexed else "RGBA8888",
             "size": {"w": max_width, "h": total_height},
             "scale": "1"
         }
     }
 
     # Save the JSON metadata
-    json_filename = input_image_path+".json"
+    json_filename = json_path or input_image_path+".json"
     with open(json_filename, 'w') as json_file:
         json.dump(spritesheet_data, json_file, indent=4)
 
     print(f"Spritesheet saved as {spritesheet_filename}")
     print(f"Metadata saved as {json_filename}")
 
+    if compact:
+        from atlas import write_binary_atlas, write_minified_json
+        write_minified_json(input_image_path+".min.json", spritesheet_data)
+        write_binary_atlas(input_image_path+".atlas", spritesheet_data)
+        print(f"Compact metadata saved as {input_image_path}.min.json and {input_image_path}.atlas")
+
 
 if __name__ == "__main__":
-    import sys
-    import os
+    import argparse
 
-    if len(sys.argv) != 2:
-        print(
-            f"Usage: python {os.path.basename(__file__)} <input_image_path> ")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Combines the PNG frames of a folder into a spritesheet with JSON metadata.")
+    parser.add_argument("input_image_path", help="Folder with the frame PNG files.")
+    parser.add_argument("--indexed", action="store_true",
+                        help="Write an indexed PNG with one shared RGBA palette.")
+    parser.add_argument("--colors", type=int, default=256,
+                        help="Palette size for --indexed (2-256).")
+    parser.add_argument("--compact", action="store_true",
+                        help="Also write minified JSON and a binary .atlas index.")
+    parser.add_argument("--collision", action="store_true",
+                        help="Add collision masks, hulls and circles to the frame data.")
+    parser.add_argument("--animation-frames", default="01,02,03,04,05,06,07,06,04,02",
+                        help="Comma separated frame names (without .png) of the animation.")
+    parser.add_argument("--animation-name", default="fly",
+                        help="Name of the animation in the metadata.")
+    parser.add_argument("--frame-prefix",
+                        help="Prefix of the frame names in the metadata (default: <folder>_).")
+    parser.add_argument("--json", help="Metadata path (default: <folder>.json).")
 
-    input_image_path = sys.argv[1]
-    create_spritesheet(input_image_path)
+    args = parser.parse_args()
+    create_spritesheet(args.input_image_path, animation_frames=args.animation_frames,
+                       indexed=args.indexed, num_colors=args.colors,
+                       compact=args.compact, collision=args.collision,
+                       animation_name=args.animation_name, json_path=args.json,
+                       frame_prefix=args.frame_prefix)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import os
+import re
+from bs4 import BeautifulSoup
+
+# The page lives in the Next.js public folder, next to the extracted svgs
+PUBLIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "..", "nextjs-butterfly", "public")
+
+
+def sanitize_filename(filename):
+    """
+    Replace non-alphanumeric characters with underscores
+    to keep filenames safe for most file systems.
+    """
+    return re.sub(r'[^A-Za-z0-9]+', '_', filename).strip('_').lower()
+
+
+def extract_svgs(html_file=None, output_dir=None):
+    """
+    Save the first <svg> after every <h1> heading of html_file into
+    output_dir, named after the heading text. By default html_file is
+    public/flowers.html and output_dir the svgs folder next to it.
+    """
+    if html_file is None:
+        html_file = os.path.join(PUBLIC_DIR, "flowers.html")
+    if output_dir is None:
+        output_dir = os.path.join(os.path.dirname(html_file), "svgs")
+
+    # Create output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(html_file, "r", encoding="utf-8") as f:
+        soup = BeautifulSoup(f, "html.parser")
+
+    # Find all h1 elements in the document
+    headings = soup.find_all("h1")
+
+    for heading in headings:
+        # Extract heading text (and strip extra whitespace)
+        heading_text = heading.get_text(strip=True)
+        if not heading_text:
+            continue  # Skip empty headings
+
+        # Find the next <svg> sibling after this heading
+        svg_tag = heading.find_next("svg")
+        if svg_tag:
+            # Convert the <svg> tag (and its contents) to string
+            svg_code = str(svg_tag)
+
+            # Create a safe filename from the heading text
+            svg_filename = sanitize_filename(heading_text) + ".svg"
+            svg_path = os.path.join(output_dir, svg_filename)
+
+            # Write the SVG code to the file
+            with open(svg_path, "w", encoding="utf-8") as svg_file:
+                svg_file.write(svg_code)
+
+            print(f"Saved: {svg_filename}")
+        else:
+            print(f"No <svg> found after heading: {heading_text}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 3:
+        print(f"Usage: python {os.path.basename(__file__)} [html_file] [output_dir]")
+        sys.exit(1)
+
+    extract_svgs(*sys.argv[1:])
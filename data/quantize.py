@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import math
+import numpy as np
+from PIL import Image
+
+
+def _weighted_median_cut(colors, weights, num_colors):
+    """
+    Split the color cloud into num_colors boxes with median cut.
+    Each step splits the box with the largest (weighted) spread along its
+    widest channel, at the weighted median. Returns an array of box means.
+    """
+    def score(idx):
+        # Largest spread * pixel count decides which box is split next
+        if len(idx) < 2:
+            return 0.0, 0
+        box = colors[idx]
+        spread = box.max(axis=0) - box.min(axis=0)
+        channel = int(spread.argmax())
+        return float(spread[channel]) * float(weights[idx].sum()), channel
+
+    boxes = [np.arange(len(colors))]
+    scores = [score(boxes[0])]
+
+    while len(boxes) < num_colors:
+        best_index = max(range(len(boxes)), key=lambda i: scores[i][0])
+        if scores[best_index][0] <= 0.0:
+            break  # every box holds a single color
+
+        idx = boxes.pop(best_index)
+        _, channel = scores.pop(best_index)
+        order = idx[np.argsort(colors[idx, channel], kind="stable")]
+        cumulative = np.cumsum(weights[order])
+        split = int(np.searchsorted(cumulative, cumulative[-1] / 2.0))
+        split = min(max(split, 1), len(order) - 1)
+        for half in (order[:split], order[split:]):
+            boxes.append(half)
+            scores.append(score(half))
+
+    return np.array([
+        np.average(colors[idx], axis=0, weights=weights[idx]) for idx in boxes
+    ])
+
+
+def _nearest(colors, palette, chunk_size=16384):
+    """Index of the nearest palette entry for every color, in chunks."""
+    labels = np.empty(len(colors), dtype=np.int64)
+    palette = palette.astype(np.float32)
+    palette_sq = (palette ** 2).sum(axis=1)
+    for start in range(0, len(colors), chunk_size):
+        chunk = colors[start:start + chunk_size].astype(np.float32)
+        # |c - p|^2 = |c|^2 - 2 c.p + |p|^2, |c|^2 does not change the argmin
+        distances = palette_sq[None, :] - 2.0 * chunk @ palette.T
+        labels[start:start + chunk_size] = distances.argmin(axis=1)
+    return labels
+
+
+def quantize_rgba(pixels, num_colors=256, iterations=8):
+    """
+    Quantize an (H, W, 4) uint8 RGBA array to a shared palette.
+
+    Fully transparent pixels all map to palette index 0. The remaining
+    colors are clustered with median cut followed by a few weighted k-means
+    iterations over the unique colors.
+
+    Returns (indices, palette) where indices is an (H, W) uint8 array and
+    palette is a (num_colors, 4) uint8 array.
+    """
+    if not 2 <= num_colors <= 256:
+        raise ValueError("num_colors must be between 2 and 256.")
+
+    height, width, _ = pixels.shape
+    flat = pixels.reshape(-1, 4)
+    opaque = flat[:, 3] > 0
+
+    # Work on unique colors weighted by their pixel count
+    packed = flat[opaque].view(np.uint32).ravel()
+    unique, inverse, counts = np.unique(
+        packed, return_inverse=True, return_counts=True)
+    colors = unique.view(np.uint8).reshape(-1, 4).astype(np.float64)
+    weights = counts.astype(np.float64)
+
+    # Index 0 is reserved for fully transparent pixels
+    palette_size = num_colors - 1
+    if len(colors) <= palette_size:
+        palette = colors
+        labels = np.arange(len(colors))
+    else:
+        palette = _weighted_median_cut(colors, weights, palette_size)
+        for _ in range(iterations):
+            labels = _nearest(colors, palette)
+            totals = np.bincount(labels, weights=weights,
+                                 minlength=len(palette))
+            sums = np.stack([
+                np.bincount(labels, weights=colors[:, c] * weights,
+                            minlength=len(palette))
+                for c in range(4)
+            ], axis=1)
+            used = totals > 0
+            palette[used] = sums[used] / totals[used, None]
+        labels = _nearest(colors, palette)
+
+    full_palette = np.zeros((len(palette) + 1, 4), dtype=np.uint8)
+    full_palette[1:] = np.clip(np.rint(palette), 0, 255)
+
+    indices = np.zeros(height * width, dtype=np.uint8)
+    indices[opaque] = (labels[inverse.ravel()] + 1).astype(np.uint8)
+    return indices.reshape(height, width), full_palette
+
+
+def _premultiplied(pixels):
+    """RGBA as float with color scaled by alpha, so hidden colors do not count."""
+    pixels = pixels.astype(np.float64)
+    pixels[..., :3] *= pixels[..., 3:] / 255.0
+    return pixels
+
+
+def psnr(original, indices, palette):
+    """Peak signal-to-noise ratio (dB) of the quantized image, premultiplied RGBA."""
+    restored = _premultiplied(palette[indices])
+    mse = np.mean((_premultiplied(original) - restored) ** 2)
+    if mse == 0:
+        return math.inf
+    return 10.0 * math.log10(255.0 ** 2 / mse)
+
+
+def quantize_image(image, num_colors=256, iterations=8):
+    """
+    Quantize a PIL image to an indexed ("P" mode) image with an RGBA palette.
+    Returns (indexed_image, psnr_db).
+    """
+    pixels = np.asarray(image.convert("RGBA"))
+    indices, palette = quantize_rgba(pixels, num_colors, iterations)
+
+    height, width = indices.shape
+    indexed = Image.frombytes("P", (width, height), indices.tobytes())
+    indexed.putpalette(palette.tobytes(), rawmode="RGBA")
+    return indexed, psnr(pixels, indices, palette)
+
+
+if __name__ == "__main__":
+    import sys
+    import os
+
+    if len(sys.argv) not in (3, 4):
+        print(
+            f"Usage: python {os.path.basename(__file__)} <input.png> <output.png> [num_colors]")
+        sys.exit(1)
+
+    num_colors = int(sys.argv[3]) if len(sys.argv) == 4 else 256
+    with Image.open(sys.argv[1]) as img:
+        indexed, quality = quantize_image(img, num_colors)
+    indexed.save(sys.argv[2], optimize=True)
+    print(f"Saved {sys.argv[2]} ({num_colors} colors, PSNR {quality:.2f} dB)")
@@ -3,12 +3,14 @@
 import sys
 from PIL import Image
 
+from writer import use_writer
 
-def resize_to_width(input_path: str, output_path: str, new_width: int = 800):
+
+def resize_to_width(input_path: str, output_path: str, new_width: int = 800, writer=None):
     """
     Resizes the input image to the specified new_width while
     preserving aspect ratio (height is automatically adjusted).
-    Saves the result to output_path.
+    Saves the result to output_path with writer (see writer.py).
     """
     # Open the image
     with Image.open(input_path) as img:
@@ -21,7 +23,8 @@ def resize_to_width(input_path: str, output_path: str, new_width: int = 800):
         resized_img = img.resize((new_width, new_height), Image.LANCZOS)
 
         # Save the resized image
-        resized_img.save(output_path)
+        with use_writer(writer) as out:
+            output_path = out.save(resized_img, output_path)
         print(f"Saved resized image to: {output_path}")
 
 
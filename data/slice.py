@@ -1,32 +1,171 @@
 #!/usr/bin/env python3
 
 import argparse
+import functools
 import os
+import numpy as np
 from PIL import Image
 
+from writer import use_writer
+
+
+@functools.lru_cache(maxsize=None)
+def lanczos_taps(src_width: int, dst_width: int, a: int = 3) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Banded horizontal Lanczos weights, with the same support widening as
+    Pillow when downscaling: for every output column the first source column
+    it reads and the weights of the following taps, shapes (dst_width,) and
+    (dst_width, taps) with taps about 2 * a * scale. Taps past the right edge
+    have weight 0. Cached, so the results are read-only.
+    """
+    if src_width < 1 or dst_width < 1:
+        raise ValueError(f"Cannot resample from width {src_width} to width {dst_width}.")
+    scale = src_width / dst_width
+    support = a * max(scale, 1.0)
+    taps = int(np.ceil(2 * support)) + 1
+
+    centers = (np.arange(dst_width) + 0.5) * scale
+    first = np.clip(np.floor(centers - support + 0.5).astype(np.int64), 0, src_width - 1)
+    x = (first[:, None] + np.arange(taps)[None, :] + 0.5 - centers[:, None]) / max(scale, 1.0)
+
+    weights = np.sinc(x) * np.sinc(x / a)
+    weights[(np.abs(x) >= a) | (first[:, None] + np.arange(taps) >= src_width)] = 0.0
+    weights /= weights.sum(axis=1, keepdims=True)
+    weights = weights.astype(np.float32)
+    first.setflags(write=False)
+    weights.setflags(write=False)
+    return first, weights
+
+
+@functools.lru_cache(maxsize=None)
+def lanczos_blocks(src_width: int, dst_width: int, block: int = 32) -> tuple[tuple, ...]:
+    """
+    The banded weights cut into dense tiles of `block` output columns:
+    (dst_start, dst_end, src_start, src_end, weights) where weights only
+    spans the source columns those outputs read. Cached and read-only
+    like lanczos_taps.
+    """
+    first, weights = lanczos_taps(src_width, dst_width)
+    taps = weights.shape[1]
+    tiles = []
+    for start in range(0, dst_width, block):
+        end = min(start + block, dst_width)
+        src_start = int(first[start])
+        src_end = min(int(first[end - 1]) + taps, src_width)
+        tile = np.zeros((end - start, src_end - src_start), dtype=np.float32)
+        for row, out in enumerate(range(start, end)):
+            offset = int(first[out]) - src_start
+            span = min(taps, src_end - src_start - offset)
+            tile[row, offset:offset + span] = weights[out, :span]
+        tile.setflags(write=False)
+        tiles.append((start, end, src_start, src_end, tile))
+    return tuple(tiles)
+
+
+def resample_widths(pixels: np.ndarray, widths: list[int]) -> list[np.ndarray]:
+    """
+    Resize an (H, W, 4) RGBA uint8 array horizontally to each of the given
+    widths. Each tile of output columns is one small matrix product over
+    only the source columns in its Lanczos band; alpha is premultiplied
+    like Pillow does and fully transparent rows are skipped.
+    """
+    height, src_width, _ = pixels.shape
+    if src_width < 1 or min(widths, default=1) < 1:
+        raise ValueError(
+            f"Cannot resample a {src_width} pixel wide wing to widths {list(widths)}; "
+            f"all widths must be at least 1 pixel.")
+    rows = np.flatnonzero(pixels[..., 3].any(axis=1))
+    # Column-major and channel-planar (W, 4, rows), so every source column
+    # is one contiguous row of the matrix products below
+    planar = np.ascontiguousarray(pixels[rows].transpose(1, 2, 0), dtype=np.float32)
+    planar[:, :3] *= planar[:, 3:] / 255.0
+    columns = planar.reshape(src_width, -1)
+
+    resized = np.empty((sum(widths), columns.shape[1]), dtype=np.float32)
+    offset = 0
+    for width in widths:
+        for start, end, src_start, src_end, tile in lanczos_blocks(src_width, width):
+            np.matmul(tile, columns[src_start:src_end], out=resized[offset + start:offset + end])
+        offset += width
+    resized = resized.reshape(sum(widths), 4, len(rows))
+
+    alpha = np.clip(resized[:, 3:], 0.0, 255.0, out=resized[:, 3:])
+    resized[:, :3] *= np.divide(255.0, alpha, out=np.zeros_like(alpha), where=alpha > 0)
+    np.clip(np.rint(resized, out=resized), 0, 255, out=resized)
+
+    out = np.zeros((height, sum(widths), 4), dtype=np.uint8)
+    out[rows] = resized.astype(np.uint8).transpose(2, 0, 1)
+    return np.split(out, np.cumsum(widths)[:-1], axis=1)
+
+
+def is_symmetric(left: np.ndarray, right: np.ndarray, tolerance: int = 2) -> bool:
+    """True if the right wing is (almost) the mirror image of the left wing."""
+    if left.shape != right.shape:
+        return False
+    difference = np.abs(left.astype(np.int16) - right[:, ::-1].astype(np.int16))
+    return int(difference.max(initial=0)) <= tolerance
+
+
+def resolve_max_wing_width(
+    max_wing_width: int | str,
+    input_path: str | Image.Image,
+    body_width: int,
+    min_wing_width: int,
+) -> int:
+    """
+    The maximum wing width as an int. 'auto' computes it from the image as
+    (image.width / 2) - body_width, which must not be below min_wing_width.
+    """
+    if str(max_wing_width).lower() != "auto":
+        return int(max_wing_width)
+
+    if isinstance(input_path, Image.Image):
+        w = input_path.width
+    else:
+        with Image.open(input_path) as img:
+            w, _ = img.size
+    computed_max = (w // 2) - body_width
+    if computed_max < min_wing_width:
+        raise ValueError(
+            f"Computed max wing width ({computed_max}) is less than "
+            f"min wing width ({min_wing_width})."
+        )
+    return computed_max
+
 
 def slice_and_resize_butterfly(
-    input_path: str,
+    input_path: str | Image.Image,
     body_width: int,
     min_wing_width: int,
     max_wing_width: int,
     output_dir: str = "outputs",
     create_last_slices: bool = False,
+    mirror_wings: bool | None = None,
+    writer=None,
 ):
     """
     Slices a top-down butterfly image into left wing, body, and right wing.
     Keeps the body at the given width, and resizes the wings to 10
     different widths between min_wing_width and max_wing_width (inclusive).
 
-    :param input_path: Path to the input PNG image of the butterfly.
+    :param input_path: Path to the input PNG image of the butterfly, or an
+        already opened image.
     :param body_width: The (horizontal) width in pixels of the butterfly's body.
     :param min_wing_width: The minimum target width for one wing.
     :param max_wing_width: The maximum target width for one wing.
     :param output_dir: Directory where output files will be saved.
+    :param mirror_wings: Use the mirrored left wing as the right wing. None
+        checks whether the art is symmetric.
+    :param writer: ImageWriter used to encode the frames (see writer.py).
+    :return: The frames as a dict of filename -> Image, e.g. for
+        combine.create_spritesheet(images=...).
     """
 
-    # Open the original image
-    original_img = Image.open(input_path).convert("RGBA")
+    # Open the original image (unless the caller already has it decoded)
+    if isinstance(input_path, Image.Image):
+        original_img = input_path.convert("RGBA")
+    else:
+        original_img = Image.open(input_path).convert("RGBA")
     w, h = original_img.size
 
     # Compute center (assuming butterfly is horizontally centered)
@@ -59,45 +198,46 @@ def slice_and_resize_butterfly(
     else:
         step = 0
 
-    for i in range(num_outputs):
-        # Current wing width for each side
-        current_wing_width = int(min_wing_width + i * step)
-
-        # Resize the left and right wings horizontally to current_wing_width
-        new_left_wing = left_wing.resize(
-            (current_wing_width, h), resample=Image.LANCZOS)
-        new_right_wing = right_wing.resize(
-            (current_wing_width, h), resample=Image.LANCZOS)
+    wing_widths = [int(min_wing_width + i * step) for i in range(num_outputs)]
 
-        # Construct a new blank image with width = left_wing + body + right_wing
-        new_width = current_wing_width + body_width + current_wing_width
-        new_img = Image.new("RGBA", (new_width, h), (0, 0, 0, 0))
+    # Resample every target width in one pass; mirror the left wing when the
+    # art is symmetric instead of resampling the right wing as well
+    left_pixels = np.asarray(left_wing)
+    right_pixels = np.asarray(right_wing)
+    if mirror_wings is None:
+        mirror_wings = is_symmetric(left_pixels, right_pixels)
 
-        # Paste the pieces back together
-        # left wing at x=0
-        new_img.paste(new_left_wing, (0, 0))
-        # body follows right after left wing
-        new_img.paste(body, (current_wing_width, 0))
-        # right wing follows right after body
-        new_img.paste(new_right_wing, (current_wing_width + body_width, 0))
+    new_left_wings = resample_widths(left_pixels, wing_widths)
+    if mirror_wings:
+        new_right_wings = [wing[:, ::-1] for wing in new_left_wings]
+    else:
+        new_right_wings = resample_widths(right_pixels, wing_widths)
 
-        # save the narrowest image to 07.png, and from there wider ones up to 01.png
-        filename = f"{(num_outputs - i):02d}.png"
-        output_filename = os.path.join(output_dir, filename)
-        new_img.save(output_filename, "PNG")
+    body_pixels = np.asarray(body)
 
-        # 8 9 10 can be created from 5 3 1 when making the animation frames
-        if create_last_slices:
+    images = {}
+    with use_writer(writer) as out:
+        for i in range(num_outputs):
+            # Left wing, body and right wing side by side
+            new_img = Image.fromarray(np.concatenate(
+                [new_left_wings[i], body_pixels, new_right_wings[i]], axis=1))
 
-            if filename == '05.png':
-                new_img.save(os.path.join(output_dir, "08.png"), "PNG")
-            if filename == '03.png':
-                new_img.save(os.path.join(output_dir, "09.png"), "PNG")
-            if filename == '01.png':
-                new_img.save(os.path.join(output_dir, "10.png"), "PNG")
+            # save the narrowest image to 07.png, and from there wider ones up to 01.png
+            filename = f"{(num_outputs - i):02d}.png"
+            output_filename = os.path.join(output_dir, filename)
 
-        print(f"Saved {i}")
+            # 8 9 10 can be created from 5 3 1 when making the animation frames,
+            # written from the same encoded bytes
+            copies = []
+            if create_last_slices:
+                last_slice = {"05.png": "08.png", "03.png": "09.png", "01.png": "10.png"}.get(filename)
+                if last_slice:
+                    copies.append(os.path.join(output_dir, last_slice))
+            for path in [out.save(new_img, output_filename, copies=copies), *copies]:
+                images[os.path.basename(out.output_path(path))] = new_img
 
+            print(f"Saved {i}")
+    return images
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -117,22 +257,16 @@ if __name__ == "__main__":
             '(image.width / 2) - body_width.'
         )
     )
+    parser.add_argument(
+        "--mirror-wings", action="store_true", default=None,
+        help="Mirror the left wing as the right wing even if the art is not "
+             "exactly symmetric (by default this is detected).")
 
     args = parser.parse_args()
 
     # If the user typed "auto" for max_wing_width, compute it
-    if args.max_wing_width.lower() == "auto":
-        with Image.open(args.input_file) as img:
-            w, _ = img.size
-        computed_max = (w // 2) - args.body_width
-        if computed_max < args.min_wing_width:
-            raise ValueError(
-                f"Computed max wing width ({computed_max}) is less than min wing width ({
-                    args.min_wing_width})."
-            )
-        max_wing_width = computed_max
-    else:
-        max_wing_width = int(args.max_wing_width)
+    max_wing_width = resolve_max_wing_width(
+        args.max_wing_width, args.input_file, args.body_width, args.min_wing_width)
 
     # Call the main slicing/resizing function
     slice_and_resize_butterfly(
@@ -140,5 +274,6 @@ if __name__ == "__main__":
         body_width=args.body_width,
         min_wing_width=args.min_wing_width,
         max_wing_width=max_wing_width,
-        output_dir=args.output_folder
+        output_dir=args.output_folder,
+        mirror_wings=args.mirror_wings
     )
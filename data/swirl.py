@@ -1,51 +1,32 @@
-from PIL import Image, ImageDraw, ImageChops
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+import functools
 import math, os, sys
 import random
+import tempfile
+import numpy as np
 
-def swirl_once(image, swirl_center, swirl_amount):
-    """
-    Swirl the image around a single center by a given swirl_amount.
-    Returns a new, swirled image (RGBA).
-    """
-    width, height = image.size
-    cx, cy = swirl_center
-    max_r = min(width, height) / 2.0
-
-    new_img = Image.new("RGBA", (width, height))
-    src_pixels = image.load()
-    dst_pixels = new_img.load()
-
-    for y in range(height):
-        for x in range(width):
-            dx = x - cx
-            dy = y - cy
-            r = math.sqrt(dx*dx + dy*dy)
-
-            if r == 0:
-                dst_pixels[x, y] = src_pixels[x, y]
-                continue
-
-            theta = math.atan2(dy, dx)
-            frac = min(r / max_r, 1.0)
-            new_theta = theta + frac * swirl_amount
+from writer import use_writer
 
-            nx = cx + r * math.cos(new_theta)
-            ny = cy + r * math.sin(new_theta)
-            nx_int, ny_int = int(round(nx)), int(round(ny))
-
-            if 0 <= nx_int < width and 0 <= ny_int < height:
-                dst_pixels[x, y] = src_pixels[nx_int, ny_int]
-            else:
-                dst_pixels[x, y] = (0, 0, 0, 0)
-
-    return new_img
-
-def swirl_image_with_three_centers(image, frame_index, total_frames, total_swirl_strength):
+def swirl_coords(xs, ys, swirl_center, swirl_amount, max_r):
     """
-    Applies swirling around three distinct centers arranged in a triangle.
-    Each center is half-way between the bubble center and the edge.
+    Source pixel coordinates that a swirl samples for the output pixels
+    (xs, ys): each pixel is rotated around the center by an angle growing
+    linearly with its distance, up to swirl_amount at max_r and beyond.
+    Returns rounded integer arrays (nx, ny).
     """
-    width, height = image.size
+    cx, cy = swirl_center
+    dx = xs - cx
+    dy = ys - cy
+    angle = np.minimum(np.hypot(dx, dy) / max_r, 1.0) * swirl_amount
+    cos_a = np.cos(angle)
+    sin_a = np.sin(angle)
+    nx = np.rint(cx + dx * cos_a - dy * sin_a).astype(np.int64)
+    ny = np.rint(cy + dx * sin_a + dy * cos_a).astype(np.int64)
+    return nx, ny
+
+def three_swirl_centers(width, height):
+    """Three swirl centers in a triangle, half-way between the center and the edge."""
     cx, cy = width / 2.0, height / 2.0
     max_r = min(cx, cy)
     swirl_radius = max_r / 2.0
@@ -57,28 +38,149 @@ def swirl_image_with_three_centers(image, frame_index, total_frames, total_swirl
         sx = cx + swirl_radius * math.cos(angle_rad)
         sy = cy + swirl_radius * math.sin(angle_rad)
         swirl_centers.append((sx, sy))
+    return swirl_centers
 
-    if total_frames > 1:
-        swirl_factor = (frame_index / (total_frames - 1))
+###############################################################################
+# Tiled swirl for images too large to warp in one go. Each output tile maps
+# its pixels back through the swirls, reads only the source region they land
+# in and is written straight into the output array. Source and output can be
+# memory-mapped .npy files, so memory stays bounded by the tiles in flight. NumPy releases the GIL, so tiles run on a thread pool.
+###############################################################################
+
+def swirl_lookup(width, height, bounds, swirls):
+    """
+    Source coordinates (xs, ys) sampled by the output pixels in bounds
+    (x0, y0, x1, y1) when `swirls` (a list of (center, amount) applied one
+    after the other) warp a width x height image, and
+    the mask of the pixels that land inside the image. xs and ys are clipped
+    into the image.
+    """
+    max_r = min(width, height) / 2.0
+    x0, y0, x1, y1 = bounds
+
+    ys, xs = np.mgrid[y0:y1, x0:x1]
+    valid = np.ones(xs.shape, dtype=bool)
+    # The last swirl is sampled first when mapping output back to source
+    for center, amount in reversed(swirls):
+        xs, ys = swirl_coords(xs, ys, center, amount, max_r)
+        valid &= (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        np.clip(xs, 0, width - 1, out=xs)
+        np.clip(ys, 0, height - 1, out=ys)
+    return xs, ys, valid
+
+def warp_tile(source, bounds, swirls):
+    """
+    Compute one output tile of applying `swirls` (see swirl_lookup) to
+    `source`, an (H, W, 4) RGBA or (H, W, 3) RGB array (made opaque).
+    bounds is (x0, y0, x1, y1). Returns a (y1 - y0, x1 - x0, 4) uint8 array.
+    """
+    height, width = source.shape[:2]
+    x0, y0, x1, y1 = bounds
+    xs, ys, valid = swirl_lookup(width, height, bounds, swirls)
+
+    tile = np.zeros((y1 - y0, x1 - x0, 4), dtype=np.uint8)
+    if not valid.any():
+        return tile
+
+    src_xs = xs[valid]
+    src_ys = ys[valid]
+    sx0 = int(src_xs.min())
+    sy0 = int(src_ys.min())
+    sx1 = int(src_xs.max()) + 1
+    sy1 = int(src_ys.max()) + 1
+
+    # Only this region of the source is read (lazily, for a memmap)
+    region = np.asarray(source[sy0:sy1, sx0:sx1])
+    if region.shape[2] == 3:
+        tile[valid, :3] = region[src_ys - sy0, src_xs - sx0]
+        tile[valid, 3] = 255
     else:
-        swirl_factor = 1.0
-    swirl_amount_for_this_frame = total_swirl_strength * swirl_factor
+        tile[valid] = region[src_ys - sy0, src_xs - sx0, :4]
+    return tile
+
+def swirl_tiled(source, output, swirls, tile_size=512, workers=None):
+    """
+    Fill `output` (an (H, W, 4) uint8 array or memmap) with the swirled
+    `source`, tile by tile on a thread pool.
+    """
+    height, width = source.shape[:2]
 
-    swirled_img = image
-    for center in swirl_centers:
-        swirled_img = swirl_once(swirled_img, center, swirl_amount_for_this_frame)
+    def run(bounds):
+        x0, y0, x1, y1 = bounds
+        output[y0:y1, x0:x1] = warp_tile(source, bounds, swirls)
 
-    return swirled_img
+    tiles = [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in range(0, height, tile_size)
+        for x in range(0, width, tile_size)
+    ]
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        # list() re-raises any exception from the tiles
+        list(pool.map(run, tiles))
+    return output
+
+def swirl_large_image(input_path, output_path, swirl_amount, three_centers=True,
+                      tile_size=512, workers=None, writer=None):
+    """
+    Swirl a (large) image tile by tile. .npy files are memory-mapped for
+    both input and output. Other input formats are decoded by Pillow; other
+    output formats are warped into a temporary .npy memmap next to the
+    output and encoded from there, so the result is never held in memory.
+    """
+    if input_path.endswith(".npy"):
+        source = np.load(input_path, mmap_mode="r")
+        if source.ndim != 3 or source.shape[2] not in (3, 4) or source.dtype != np.uint8:
+            raise ValueError(
+                f"{input_path} must hold an (H, W, 3) RGB or (H, W, 4) RGBA uint8 array, "
+                f"got shape {source.shape} and dtype {source.dtype}.")
+    else:
+        with Image.open(input_path) as img:
+            source = np.asarray(img.convert("RGBA"))
+    height, width = source.shape[:2]
+
+    if three_centers:
+        centers = three_swirl_centers(width, height)
+    else:
+        centers = [(width / 2.0, height / 2.0)]
+    swirls = [(center, swirl_amount) for center in centers]
+
+    if output_path.endswith(".npy"):
+        output = np.lib.format.open_memmap(
+            output_path, mode="w+", dtype=np.uint8, shape=(height, width, 4))
+        swirl_tiled(source, output, swirls, tile_size=tile_size, workers=workers)
+        output.flush()
+        print(f"Saved {output_path}")
+        return
+
+    fd, temp_path = tempfile.mkstemp(
+        suffix=".npy", dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        output = np.lib.format.open_memmap(
+            temp_path, mode="w+", dtype=np.uint8, shape=(height, width, 4))
+        swirl_tiled(source, output, swirls, tile_size=tile_size, workers=workers)
+        output.flush()
+        # Shares the memmap instead of copying it
+        image = Image.frombuffer("RGBA", (width, height), output, "raw", "RGBA", 0, 1)
+        with use_writer(writer) as out:
+            output_path = out.save(image, output_path)
+        del image, output
+    finally:
+        os.remove(temp_path)
+    print(f"Saved {output_path}")
 
 def create_drops_data(num_drops, center, max_r):
     """
-    Generate per-drop parameters for 5 drops that are:
+    Generate per-drop parameters for num_drops drops that are:
       - Evenly spaced around 360°, but with small random offset
       - Start at ~2/3 * max_r, end near the edge
       - Each has a random arc between e.g. 60°..120°
       - Each starts small and grows
+    Returns an empty list for num_drops <= 0.
     """
     drops = []
+    if num_drops <= 0:
+        return drops
     cx, cy = center
 
     random.seed(42)  # for reproducibility; remove or change if you want random each run
@@ -114,48 +216,101 @@ def create_drops_data(num_drops, center, max_r):
 
     return drops
 
-def draw_teardrop(draw, x, y, orientation_deg, size, color):
+def teardrop_sdf(px, py, x, y, orientation_deg, size):
     """
-    Draw a simple teardrop shape at (x, y), oriented by orientation_deg (degrees).
-    'size' roughly controls how large the drop is.
-
-    We'll do a rough polygon: top pointed, bottom round-ish.
-
-    Local coords (before rotation):
-       (0, -size)          <- top tip
-       ( size*0.6, size*0.4)
-       (0,  size)
-       (-size*0.6, size*0.4)
-    Then rotate about (0,0) by orientation_deg, and translate to (x, y).
+    Signed distance (pixels, negative inside) from points (px, py) to
+    teardrops centered at (x, y) and rotated by orientation_deg. The drop has
+    a round bottom of radius 0.6 * size and a pointed top at distance size
+    from the center, like the old four-point polygon. px, py broadcast
+    against the per-drop arrays.
     """
-    local_points = [
-        (0, -size),
-        ( size*0.6,  size*0.4),
-        (0,  size),
-        (-size*0.6,  size*0.4)
-    ]
-    rad = math.radians(orientation_deg)
-    cosA = math.cos(rad)
-    sinA = math.sin(rad)
-
-    global_points = []
-    for (lx, ly) in local_points:
-        rx = lx*cosA - ly*sinA
-        ry = lx*sinA + ly*cosA
-        global_points.append((x + rx, y + ry))
-
-    draw.polygon(global_points, fill=color)
-
-def draw_flying_drops(image, frame_index, total_frames, drops_data, center):
+    rad = np.radians(orientation_deg)
+    cos_a = np.cos(rad)
+    sin_a = np.sin(rad)
+
+    # Rotate back into drop-local coordinates (tip towards -y)
+    dx = px - x
+    dy = py - y
+    lx = dx * cos_a + dy * sin_a
+    ly = -dx * sin_a + dy * cos_a
+
+    # Uneven capsule from a circle (radius r1) to the tip (radius 0)
+    r1 = 0.6 * size
+    h = 1.4 * size
+    qx = np.abs(lx)
+    qy = 0.4 * size - ly  # measured from the circle center towards the tip
+    b = 0.6 / 1.4  # r1 / h, the same for every drop
+    a = math.sqrt(1.0 - b * b)
+    k = -b * qx + a * qy
+
+    round_part = np.hypot(qx, qy) - r1
+    tip_part = np.hypot(qx, qy - h)
+    side_part = a * qx + b * qy - r1
+    return np.where(k < 0.0, round_part, np.where(k > a * h, tip_part, side_part))
+
+def render_teardrops(pixels, x, y, orientation_deg, size, color):
     """
-    Draw each drop as a water-drop shape.
-    - Evenly spaced starting angles + random offset
-    - Moves from (start_r, start_angle) to (end_r, start_angle+arc)
-    - Grows in size from start_size to end_size
-    - Fades out from alpha=255 to alpha=0
+    Composite anti-aliased teardrops with one RGBA color onto an (H, W, 4)
+    float array (0..255, straight alpha) in place. x, y, orientation_deg and
+    size are 1-D arrays with one entry per drop. Every drop is evaluated on
+    a small patch around it, all patches in one batch, and overlapping drops
+    are merged by their maximum coverage so each pixel is blended once.
     """
-    draw = ImageDraw.Draw(image, "RGBA")
+    height, width = pixels.shape[:2]
+    if len(x) == 0 or color[3] <= 0:
+        return pixels
+
+    # Square patch large enough for the biggest drop plus the anti-aliased edge
+    reach = float(np.max(size)) + 1.0
+    patch = int(math.ceil(2.0 * reach)) + 1
+    left = np.floor(x - reach).astype(np.int64)
+    top = np.floor(y - reach).astype(np.int64)
+    offsets = np.arange(patch)
+    ix = left[:, None, None] + offsets[None, None, :]  # (N, 1, P)
+    iy = top[:, None, None] + offsets[None, :, None]   # (N, P, 1)
+
+    # Distance at pixel centers, one pixel wide anti-aliased edge
+    distance = teardrop_sdf(ix + 0.5, iy + 0.5,
+                            x[:, None, None], y[:, None, None],
+                            orientation_deg[:, None, None], size[:, None, None])
+    patch_coverage = np.clip(0.5 - distance, 0.0, 1.0)
+
+    ix, iy = np.broadcast_arrays(ix, iy)
+    inside = (patch_coverage > 0) & (ix >= 0) & (ix < width) & (iy >= 0) & (iy < height)
+    coverage = np.zeros((height, width))
+    np.maximum.at(coverage, (iy[inside], ix[inside]), patch_coverage[inside])
+
+    src_a = coverage * (color[3] / 255.0)
+    dst_a = pixels[..., 3] / 255.0
+    out_a = src_a + dst_a * (1.0 - src_a)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for c in range(3):
+            blended = (color[c] * src_a + pixels[..., c] * dst_a * (1.0 - src_a)) / out_a
+            pixels[..., c] = np.where(out_a > 0, blended, pixels[..., c])
+    pixels[..., 3] = out_a * 255.0
+    return pixels
+
+def drop_positions(drops_data, frac, center):
+    """Per-drop arrays (x, y, orientation_deg, size) at animation progress frac."""
     cx, cy = center
+    start_angle = np.array([drop["start_angle_deg"] for drop in drops_data])
+    arc = np.array([drop["arc_degrees"] for drop in drops_data])
+    start_r = np.array([drop["start_r"] for drop in drops_data])
+    end_r = np.array([drop["end_r"] for drop in drops_data])
+    start_size = np.array([drop["start_size"] for drop in drops_data])
+    end_size = np.array([drop["end_size"] for drop in drops_data])
+
+    # Current angle, radius and size
+    angle = start_angle + arc * frac
+    r = start_r + (end_r - start_r) * frac
+    size = start_size + (end_size - start_size) * frac
+
+    x = cx + r * np.cos(np.radians(angle))
+    y = cy + r * np.sin(np.radians(angle))
+    return x, y, angle, size
+
+def drop_style(frame_index, total_frames):
+    """Animation progress (0..1) and RGBA color of the drops for a frame."""
     if total_frames > 1:
         frac = frame_index / (total_frames - 1)
     else:
@@ -164,91 +319,108 @@ def draw_flying_drops(image, frame_index, total_frames, drops_data, center):
     # alpha fades from 255 -> 0
     alpha = int(255 * (1.0 - frac))
 
-    for drop in drops_data:
-        # Unpack data
-        start_angle_deg = drop["start_angle_deg"]
-        arc_degrees = drop["arc_degrees"]
-        start_r = drop["start_r"]
-        end_r = drop["end_r"]
-        start_size = drop["start_size"]
-        end_size = drop["end_size"]
-
-        # Current angle + radius
-        current_angle_deg = start_angle_deg + arc_degrees * frac
-        current_r = start_r + (end_r - start_r) * frac
-
-        # Current size
-        current_size = start_size + (end_size - start_size) * frac
-
-        # Coordinates of drop center
-        x = cx + current_r * math.cos(math.radians(current_angle_deg))
-        y = cy + current_r * math.sin(math.radians(current_angle_deg))
-
-        # Orientation
-        orientation_deg = current_angle_deg
+    # Slightly bluish-white color
+    return frac, (230, 240, 255, alpha)
 
-        # Slightly bluish-white color
-        color = (230, 240, 255, alpha)
+def draw_flying_drops(pixels, frame_index, total_frames, drops_data, center):
+    """
+    Draw each drop as a water-drop shape onto an (H, W, 4) float frame in place.
+    - Evenly spaced starting angles + random offset
+    - Moves from (start_r, start_angle) to (end_r, start_angle+arc)
+    - Grows in size from start_size to end_size
+    - Fades out from alpha=255 to alpha=0
+    All drops are rendered at once as anti-aliased signed-distance shapes.
+    """
+    frac, color = drop_style(frame_index, total_frames)
+    x, y, orientation_deg, size = drop_positions(drops_data, frac, center)
+    return render_teardrops(pixels, x, y, orientation_deg, size, color)
 
-        # Draw
-        draw_teardrop(draw, x, y, orientation_deg, current_size, color)
+@functools.lru_cache(maxsize=16)
+def burst_geometry(width, height, frames, swirl_strength):
+    """
+    The per-frame swirl lookups of a burst animation as (valid, index) pairs,
+    index being the flat source pixel of every valid output pixel, and the
+    distance of every pixel from the center for the hole masks. Only depends
+    on the size and the swirl settings, so it is cached (watch mode rebuilds
+    reuse it); the arrays are read-only.
+    """
+    swirl_centers = three_swirl_centers(width, height)
+    lookups = []
+    for i in range(frames):
+        swirl_factor = i / (frames - 1) if frames > 1 else 1.0
+        swirls = [(center, swirl_strength * swirl_factor) for center in swirl_centers]
+        xs, ys, valid = swirl_lookup(width, height, (0, 0, width, height), swirls)
+        index = ys[valid] * width + xs[valid]
+        valid.setflags(write=False)
+        index.setflags(write=False)
+        lookups.append((valid, index))
+
+    ys, xs = np.ogrid[0:height, 0:width]
+    center_distance = np.hypot(xs - width // 2, ys - height // 2)
+    center_distance.setflags(write=False)
+    return lookups, center_distance
 
 def create_burst_sprites(
     input_image_path="bubble.png",
     output_folder=".",
     output_prefix="break",
     frames=10,
-    swirl_strength=6.28
+    swirl_strength=6.28,
+    num_drops=5,
+    writer=None,
+    separator="-"
 ):
     """
     Creates a sequence of sprites showing:
       1) A soap bubble with 3 swirl vortices
       2) A growing hole in the center
-      3) Five water-drop shapes that start small & grow, spaced around 360° with random offsets
+      3) num_drops water-drop shapes that start small & grow, spaced around 360° with random offsets
+
+    Each frame stays a single RGBA array until it is saved: the three swirls
+    are one composed lookup, the hole is a threshold on a distance map (both
+    from burst_geometry), and the drops are blended in place. Frames are
+    encoded by `writer` (an ImageWriter, see writer.py) in the background.
+
+    Frames are named <NN><separator><output_prefix>.png. Returns the frames
+    as a dict of filename -> Image, e.g. for create_spritesheet(images=...).
     """
-    # 1) Load original bubble
-    bubble = Image.open(input_image_path).convert("RGBA")
+    # 1) Load original bubble (input_image_path may also be an opened image)
+    if isinstance(input_image_path, Image.Image):
+        bubble = input_image_path.convert("RGBA")
+    else:
+        bubble = Image.open(input_image_path).convert("RGBA")
     width, height = bubble.size
     cx, cy = width//2, height//2
     max_radius = min(cx, cy)
 
+    bubble_pixels = np.asarray(bubble).reshape(-1, 4)
+    lookups, center_distance = burst_geometry(width, height, frames, swirl_strength)
+
     # 2) Create random drop flight parameters once
-    num_drops = 5
     drops_data = create_drops_data(num_drops, (cx, cy), max_radius)
 
-    for i in range(frames):
-        # a) Swirl
-        swirled = swirl_image_with_three_centers(
-            image=bubble,
-            frame_index=i,
-            total_frames=frames,
-            total_swirl_strength=swirl_strength
-        )
-
-        # b) Create mask for the hole
-        mask = Image.new("L", (width, height), color=255)
-        draw_mask = ImageDraw.Draw(mask)
-        radius = int(((i + 1)/frames) * max_radius)
-        draw_mask.ellipse((cx - radius, cy - radius, cx + radius, cy + radius), fill=0)
-
-        swirled_alpha = swirled.split()[3]
-        combined_alpha = ImageChops.multiply(swirled_alpha, mask)
-        final_frame = swirled.copy()
-        final_frame.putalpha(combined_alpha)
-
-        # c) Draw the flying drops (small -> big, fade out)
-        draw_flying_drops(
-            image=final_frame,
-            frame_index=i,
-            total_frames=frames,
-            drops_data=drops_data,
-            center=(cx, cy)
-        )
-
-        # d) Save
-        filename = f"{output_folder}/{i+1:02d}-{output_prefix}.png"
-        final_frame.save(filename)
-        print(f"Saved {filename}")
+    images = {}
+    with use_writer(writer) as out:
+        for i in range(frames):
+            # a) Swirl, all three centers in one lookup
+            valid, index = lookups[i]
+            frame = np.zeros((height, width, 4))
+            frame[valid] = bubble_pixels[index]
+
+            # b) Hole in the center (approximates the old ImageDraw ellipse mask)
+            radius = int(((i + 1)/frames) * max_radius)
+            frame[..., 3][center_distance <= radius + 0.5] = 0
+
+            # c) Flying drops (small -> big, fade out)
+            draw_flying_drops(frame, i, frames, drops_data, (cx, cy))
+
+            # d) Save
+            filename = f"{output_folder}/{i+1:02d}{separator}{output_prefix}.png"
+            image = Image.fromarray(np.clip(np.rint(frame), 0, 255).astype(np.uint8))
+            filename = out.save(image, filename)
+            images[os.path.basename(filename)] = image
+            print(f"Saved {filename}")
+    return images
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
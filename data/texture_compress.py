@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import struct
+import numpy as np
+from PIL import Image
+
+###############################################################################
+# Block compression for spritesheets:
+#
+#   bc1   (DXT1) two RGB565 endpoints and a 2-bit index per pixel, 1-bit alpha
+#   bc3   (DXT5) BC1 color plus 8-bit alpha endpoints with 3-bit indices
+#   etc2  (ETC2 RGBA8) EAC alpha plus an ETC1-mode color block, the format
+#         that mobile GPUs and WebGL without S3TC support
+#
+# Blocks are encoded in batches with NumPy: shape (num_blocks, 16, channels).
+# DDS has no ETC2 format, so etc2 is written as KTX only.
+###############################################################################
+
+FORMATS = {
+    # name: (bytes per block, DDS fourCC, GL internal format, GL base format)
+    "bc1": (8, b"DXT1", 0x83F1, 0x1908),  # COMPRESSED_RGBA_S3TC_DXT1_EXT
+    "bc3": (16, b"DXT5", 0x83F3, 0x1908),  # COMPRESSED_RGBA_S3TC_DXT5_EXT
+    "etc2": (16, None, 0x9278, 0x1908),  # COMPRESSED_RGBA8_ETC2_EAC
+}
+
+# ETC1 intensity modifiers per table codeword, in pixel index order
+# (0: +small, 1: +large, 2: -small, 3: -large)
+ETC_MODIFIERS = np.array([
+    [2, 8, -2, -8], [5, 17, -5, -17], [9, 29, -9, -29], [13, 42, -13, -42],
+    [18, 60, -18, -60], [24, 80, -24, -80], [33, 106, -33, -106], [47, 183, -47, -183],
+])
+
+# EAC alpha modifiers per table index, multiplied by the block's multiplier
+EAC_MODIFIERS = np.array([
+    [-3, -6, -9, -15, 2, 5, 8, 14], [-3, -7, -10, -13, 2, 6, 9, 12],
+    [-2, -5, -8, -13, 1, 4, 7, 12], [-2, -4, -6, -13, 1, 3, 5, 12],
+    [-3, -6, -8, -12, 2, 5, 7, 11], [-3, -7, -9, -11, 2, 6, 8, 10],
+    [-4, -7, -8, -11, 3, 6, 7, 10], [-3, -5, -8, -11, 2, 4, 7, 10],
+    [-2, -6, -8, -10, 1, 5, 7, 9], [-2, -5, -8, -10, 1, 4, 7, 9],
+    [-2, -4, -8, -10, 1, 3, 7, 9], [-2, -5, -7, -10, 1, 4, 6, 9],
+    [-3, -4, -7, -10, 2, 3, 6, 9], [-1, -2, -3, -10, 0, 1, 2, 9],
+    [-4, -6, -8, -9, 3, 5, 7, 8], [-3, -5, -7, -9, 2, 4, 6, 8],
+])
+
+# ETC numbers the pixels of a block column by column; image_to_blocks row by row
+_ETC_PIXEL = np.array([(k % 4) * 4 + k // 4 for k in range(16)], dtype=np.uint64)
+
+
+def image_to_blocks(pixels):
+    """
+    Split an (H, W, 4) uint8 array into (num_blocks, 16, 4) blocks in row-major
+    block order. Edges are padded by repeating the last row/column.
+    """
+    height, width, _ = pixels.shape
+    pad_h = (-height) % 4
+    pad_w = (-width) % 4
+    if pad_h or pad_w:
+        pixels = np.pad(pixels, ((0, pad_h), (0, pad_w), (0, 0)), mode="edge")
+    bh, bw = pixels.shape[0] // 4, pixels.shape[1] // 4
+    blocks = pixels.reshape(bh, 4, bw, 4, 4).transpose(0, 2, 1, 3, 4)
+    return blocks.reshape(bh * bw, 16, 4)
+
+
+def _to_565(colors):
+    """Float RGB (..., 3) in 0..255 to packed RGB565 uint16."""
+    rgb = np.clip(np.rint(colors), 0, 255).astype(np.uint16)
+    return ((rgb[..., 0] >> 3) << 11) | ((rgb[..., 1] >> 2) << 5) | (rgb[..., 2] >> 3)
+
+
+def _from_565(packed):
+    """Packed RGB565 uint16 to float RGB (..., 3) in 0..255."""
+    packed = packed.astype(np.uint32)
+    r = (packed >> 11) & 31
+    g = (packed >> 5) & 63
+    b = packed & 31
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)],
+                    axis=-1).astype(np.float64)
+
+
+def _principal_endpoints(rgb, weights):
+    """
+    Pick two endpoints per block along the principal axis of its colors.
+    rgb: (N, 16, 3) float, weights: (N, 16) float (0 for ignored pixels).
+    Returns (N, 3), (N, 3) float endpoints.
+    """
+    total = np.maximum(weights.sum(axis=1, keepdims=True), 1e-8)
+    mean = (rgb * weights[..., None]).sum(axis=1) / total
+    centered = (rgb - mean[:, None, :]) * weights[..., None]
+    covariance = np.einsum("nki,nkj->nij", centered, rgb - mean[:, None, :])
+
+    # A few power iterations are plenty for a 3x3 matrix
+    axis = np.ones((len(rgb), 3))
+    for _ in range(4):
+        axis = np.einsum("nij,nj->ni", covariance, axis)
+        norm = np.linalg.norm(axis, axis=1, keepdims=True)
+        axis = np.where(norm > 1e-8, axis / np.maximum(norm, 1e-8), 0.0)
+
+    projection = np.einsum("nki,ni->nk", rgb - mean[:, None, :], axis)
+    masked = weights > 0
+    low = np.where(masked, projection, np.inf).min(axis=1)
+    high = np.where(masked, projection, -np.inf).max(axis=1)
+    low = np.where(np.isfinite(low), low, 0.0)
+    high = np.where(np.isfinite(high), high, 0.0)
+
+    # Inset the range slightly, as most encoders do, to reduce error
+    inset = (high - low) / 16.0
+    start = mean + axis * (low + inset)[:, None]
+    end = mean + axis * (high - inset)[:, None]
+    return start, end
+
+
+def _pack_indices(indices, bits):
+    """Pack (N, 16) small integers into little-endian bit fields (uint64)."""
+    shifts = np.arange(16, dtype=np.uint64) * np.uint64(bits)
+    return (indices.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+
+
+def encode_color_blocks(blocks, allow_transparency):
+    """
+    Encode the RGB part of (N, 16, 4) blocks into (N, 8) bytes of BC1 data.
+    With allow_transparency, blocks containing pixels with alpha < 128 use the
+    3-color mode where index 3 means fully transparent.
+    """
+    rgb = blocks[..., :3].astype(np.float64)
+    transparent = blocks[..., 3] < 128
+    if not allow_transparency:
+        transparent = np.zeros_like(transparent)
+    has_transparent = transparent.any(axis=1)
+
+    if allow_transparency:
+        weights = (~transparent).astype(np.float64)
+    else:
+        # Colors hidden by low alpha matter less when fitting the endpoints
+        weights = blocks[..., 3].astype(np.float64) / 255.0
+    start, end = _principal_endpoints(rgb, weights)
+    c0 = _to_565(start)
+    c1 = _to_565(end)
+
+    # 4-color mode needs c0 > c1, 3-color mode needs c0 <= c1
+    swap = np.where(has_transparent, c0 > c1, c0 < c1)
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+    four_color = ~has_transparent & (c0 != c1)
+
+    p0 = _from_565(c0)
+    p1 = _from_565(c1)
+    palette = np.stack([
+        p0,
+        p1,
+        np.where(four_color[:, None], (2 * p0 + p1) / 3.0, (p0 + p1) / 2.0),
+        np.where(four_color[:, None], (p0 + 2 * p1) / 3.0, 0.0),
+    ], axis=1)  # (N, 4, 3)
+
+    distances = ((rgb[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=-1)
+    # In 3-color mode index 3 is reserved for transparent pixels
+    distances[:, :, 3] = np.where(four_color[:, None], distances[:, :, 3], np.inf)
+    indices = distances.argmin(axis=-1)
+    indices = np.where(transparent, 3, indices)
+    # Solid blocks (c0 == c1 without transparency) decode every index to c0
+    indices = np.where((~four_color & ~has_transparent)[:, None], 0, indices)
+
+    out = np.empty((len(blocks), 8), dtype=np.uint8)
+    out[:, 0:2] = c0.astype("<u2").view(np.uint8).reshape(-1, 2)
+    out[:, 2:4] = c1.astype("<u2").view(np.uint8).reshape(-1, 2)
+    packed = _pack_indices(indices, 2).astype("<u4")
+    out[:, 4:8] = packed.view(np.uint8).reshape(-1, 4)
+    return out
+
+
+def encode_alpha_blocks(blocks):
+    """Encode the alpha of (N, 16, 4) blocks into (N, 8) bytes of BC3 alpha data."""
+    alpha = blocks[..., 3].astype(np.int32)
+    a0 = alpha.max(axis=1)
+    a1 = alpha.min(axis=1)
+
+    # 8-value mode (a0 > a1): 6 interpolated values between the endpoints
+    weights = np.array([7, 0, 6, 5, 4, 3, 2, 1]) / 7.0
+    palette = np.rint(a0[:, None] * weights[None, :] + a1[:, None] * (1.0 - weights[None, :]))
+    indices = np.abs(alpha[:, :, None] - palette[:, None, :]).argmin(axis=-1)
+    indices = np.where((a0 == a1)[:, None], 0, indices)
+
+    out = np.empty((len(blocks), 8), dtype=np.uint8)
+    out[:, 0] = a0
+    out[:, 1] = a1
+    packed = _pack_indices(indices, 3).astype("<u8")
+    out[:, 2:8] = packed.view(np.uint8).reshape(-1, 8)[:, :6]
+    return out
+
+
+def _subblock_colors(rgb, weights, subblock):
+    """Weighted mean color (N, 2, 3) of the two sub-blocks given by subblock (16,)."""
+    means = []
+    for s in (0, 1):
+        w = weights[:, subblock == s]
+        total = np.maximum(w.sum(axis=1, keepdims=True), 1e-8)
+        means.append((rgb[:, subblock == s] * w[..., None]).sum(axis=1) / total)
+    return np.stack(means, axis=1)
+
+
+def _etc_fit(rgb, weights, subblock):
+    """
+    ETC1 base colors, tables and pixel indices for one sub-block layout.
+    Uses differential mode (5-bit base + 3-bit delta) when the two sub-block
+    colors are close enough, individual mode (two 4-bit bases) otherwise.
+    Returns a dict of the block fields and the weighted error (N,).
+    """
+    mean = _subblock_colors(rgb, weights, subblock)
+    q5 = np.clip(np.rint(mean * 31.0 / 255.0), 0, 31).astype(np.int64)
+    delta = q5[:, 1] - q5[:, 0]
+    differential = ((delta >= -4) & (delta <= 3)).all(axis=1)
+    q4 = np.clip(np.rint(mean * 15.0 / 255.0), 0, 15).astype(np.int64)
+
+    base = np.where(differential[:, None, None], (q5 << 3) | (q5 >> 2), (q4 << 4) | q4)
+    pixel_base = base[:, subblock].astype(np.float32)  # (N, 16, 3)
+
+    # Per pixel and table: the best modifier and its weighted error
+    pixel_error = np.empty(rgb.shape[:2] + (len(ETC_MODIFIERS),), dtype=np.float32)
+    pixel_index = np.empty(pixel_error.shape, dtype=np.int64)
+    for table, modifiers in enumerate(ETC_MODIFIERS):
+        errors = np.empty((4,) + rgb.shape[:2], dtype=np.float32)
+        for i, modifier in enumerate(modifiers):
+            diff = np.clip(pixel_base + modifier, 0, 255) - rgb
+            errors[i] = np.einsum("nkc,nkc->nk", diff, diff)
+        pixel_index[..., table] = errors.argmin(axis=0)
+        pixel_error[..., table] = errors.min(axis=0) * weights
+
+    # One table per sub-block: the one with the least summed error
+    table_error = np.stack([pixel_error[:, subblock == s].sum(axis=1) for s in (0, 1)], axis=1)
+    tables = table_error.argmin(axis=-1)  # (N, 2)
+    error = np.take_along_axis(table_error, tables[..., None], axis=-1)[..., 0].sum(axis=1)
+    indices = np.take_along_axis(pixel_index, tables[:, subblock][..., None], axis=-1)[..., 0]
+
+    return {"differential": differential, "q5": q5, "q4": q4,
+            "tables": tables, "indices": indices}, error
+
+
+def encode_etc_blocks(blocks):
+    """
+    Encode the RGB part of (N, 16, 4) blocks into (N, 8) bytes of ETC1 data,
+    which is also valid ETC2. Both sub-block layouts (2x4 side by side and
+    4x2 stacked) are tried and the one with the smaller error is kept.
+    Fully transparent blocks, most of a spritesheet, are left as zeros.
+    """
+    out = np.zeros((len(blocks), 8), dtype=np.uint8)
+    visible = (blocks[..., 3] > 0).any(axis=1)
+    if visible.any():
+        out[visible] = _encode_etc_visible(blocks[visible])
+    return out
+
+
+def _encode_etc_visible(blocks):
+    """ETC1 blocks for (N, 16, 4) blocks with at least one visible pixel."""
+    rgb = blocks[..., :3].astype(np.float32)
+    # Colors hidden by low alpha matter less, as in encode_color_blocks
+    weights = blocks[..., 3].astype(np.float32) / 255.0 + 1e-3
+    x = np.arange(16) % 4
+    y = np.arange(16) // 4
+
+    side_by_side, side_error = _etc_fit(rgb, weights, (x >= 2).astype(np.int64))
+    stacked, stacked_error = _etc_fit(rgb, weights, (y >= 2).astype(np.int64))
+    flip = stacked_error < side_error
+    fit = {key: np.where(flip.reshape((-1,) + (1,) * (value.ndim - 1)), stacked[key], value)
+           for key, value in side_by_side.items()}
+
+    differential = fit["differential"]
+    q5, q4 = fit["q5"], fit["q4"]
+    delta = (q5[:, 1] - q5[:, 0]) & 7
+    word = np.zeros(len(blocks), dtype=np.uint64)
+    for channel, shift in enumerate((56, 48, 40)):
+        diff_bits = (q5[:, 0, channel] << 3) | delta[:, channel]
+        individual_bits = (q4[:, 0, channel] << 4) | q4[:, 1, channel]
+        word |= np.where(differential, diff_bits, individual_bits).astype(np.uint64) << np.uint64(shift)
+    word |= fit["tables"][:, 0].astype(np.uint64) << np.uint64(37)
+    word |= fit["tables"][:, 1].astype(np.uint64) << np.uint64(34)
+    word |= differential.astype(np.uint64) << np.uint64(33)
+    word |= flip.astype(np.uint64) << np.uint64(32)
+
+    indices = fit["indices"].astype(np.uint64)
+    msb = ((indices >> np.uint64(1)) << (_ETC_PIXEL + np.uint64(16))).sum(axis=1, dtype=np.uint64)
+    lsb = ((indices & np.uint64(1)) << _ETC_PIXEL).sum(axis=1, dtype=np.uint64)
+    word |= msb | lsb
+    return word.astype(">u8").view(np.uint8).reshape(-1, 8)
+
+
+def encode_eac_alpha_blocks(blocks):
+    """
+    Encode the alpha of (N, 16, 4) blocks into (N, 8) bytes of EAC data.
+    Every table is tried with the multiplier that spans the block's alpha
+    range and its neighbours; the combination with the least error wins.
+    Blocks of a single alpha value are stored exactly with table 13, whose
+    fifth modifier is 0.
+    """
+    alpha = blocks[..., 3].astype(np.int64)
+    uniform = alpha.min(axis=1) == alpha.max(axis=1)
+    word = ((alpha[:, 0].astype(np.uint64) << np.uint64(56))
+            | (np.uint64(1) << np.uint64(52)) | (np.uint64(13) << np.uint64(48)))
+    shifts = np.uint64(45) - np.uint64(3) * _ETC_PIXEL
+    word |= (np.uint64(4) << shifts).sum(dtype=np.uint64)
+    if not uniform.all():
+        word[~uniform] = _encode_eac_varying(alpha[~uniform])
+    return word.astype(">u8").view(np.uint8).reshape(-1, 8)
+
+
+def _encode_eac_varying(alpha):
+    """(N, 16) alpha values to (N,) uint64 EAC words by searching tables and multipliers."""
+    low = alpha.min(axis=1)
+    high = alpha.max(axis=1)
+
+    best_error = np.full(len(alpha), np.inf)
+    best = np.zeros((len(alpha), 3), dtype=np.int64)  # base, multiplier, table
+    best_indices = np.zeros(alpha.shape, dtype=np.int64)
+    for table, modifiers in enumerate(EAC_MODIFIERS):
+        span = modifiers.max() - modifiers.min()
+        estimate = np.rint((high - low) / span).astype(np.int64)
+        for step in (-1, 0, 1):
+            multiplier = np.clip(estimate + step, 1, 15)
+            base = np.clip(np.rint((low + high) / 2.0
+                                   - (modifiers.max() + modifiers.min()) * multiplier / 2.0),
+                           0, 255).astype(np.int64)
+            palette = np.clip(base[:, None] + modifiers[None, :] * multiplier[:, None], 0, 255)
+            errors = (alpha[:, :, None] - palette[:, None, :]) ** 2  # (N, 16, 8)
+            indices = errors.argmin(axis=-1)
+            error = np.take_along_axis(errors, indices[..., None], axis=-1).sum(axis=(1, 2))
+            better = error < best_error
+            best_error = np.where(better, error, best_error)
+            best[better] = np.stack([base, multiplier, np.full_like(base, table)], axis=1)[better]
+            best_indices[better] = indices[better]
+
+    word = ((best[:, 0].astype(np.uint64) << np.uint64(56))
+            | (best[:, 1].astype(np.uint64) << np.uint64(52))
+            | (best[:, 2].astype(np.uint64) << np.uint64(48)))
+    shifts = np.uint64(45) - np.uint64(3) * _ETC_PIXEL
+    word |= (best_indices.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+    return word
+
+
+def compress(pixels, fmt="bc3", batch_size=16384):
+    """
+    Block-compress an (H, W, 4) uint8 array. Returns the raw block bytes.
+    Blocks are encoded batch_size at a time to keep temporary arrays small.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {sorted(FORMATS)}.")
+
+    blocks = image_to_blocks(pixels)
+    chunks = []
+    for start in range(0, len(blocks), batch_size):
+        batch = blocks[start:start + batch_size]
+        if fmt == "bc1":
+            chunks.append(encode_color_blocks(batch, allow_transparency=True))
+        elif fmt == "etc2":
+            chunks.append(np.concatenate([
+                encode_eac_alpha_blocks(batch),
+                encode_etc_blocks(batch),
+            ], axis=1))
+        else:
+            chunks.append(np.concatenate([
+                encode_alpha_blocks(batch),
+                encode_color_blocks(batch, allow_transparency=False),
+            ], axis=1))
+    return b"".join(chunk.tobytes() for chunk in chunks)
+
+###############################################################################
+# Containers
+###############################################################################
+
+
+def dds_header(width, height, fmt, data_size):
+    """128-byte DDS header (magic + DDS_HEADER) for a single-level texture."""
+    _, fourcc, _, _ = FORMATS[fmt]
+    if fourcc is None:
+        raise ValueError(f"DDS cannot hold {fmt.upper()} data, use the KTX container.")
+    flags = 0x1 | 0x2 | 0x4 | 0x1000 | 0x80000  # CAPS|HEIGHT|WIDTH|PIXELFORMAT|LINEARSIZE
+    pixel_format = struct.pack("<II4s5I", 32, 0x4, fourcc, 0, 0, 0, 0, 0)
+    header = struct.pack("<7I", 124, flags, height, width, data_size, 0, 1)
+    header += b"\x00" * 44  # dwReserved1[11]
+    header += pixel_format
+    header += struct.pack("<5I", 0x1000, 0, 0, 0, 0)  # DDSCAPS_TEXTURE
+    return b"DDS " + header
+
+
+def ktx_header(width, height, fmt, data_size):
+    """KTX 1.1 header followed by the imageSize field for one mip level."""
+    _, _, internal_format, base_format = FORMATS[fmt]
+    identifier = b"\xabKTX 11\xbb\r\n\x1a\n"
+    fields = struct.pack(
+        "<13I",
+        0x04030201,       # endianness
+        0, 1, 0,          # glType, glTypeSize, glFormat (0 for compressed)
+        internal_format,
+        base_format,
+        width, height, 0,  # pixelWidth, pixelHeight, pixelDepth
+        0, 1, 1,          # numberOfArrayElements, numberOfFaces, numberOfMipmapLevels
+        0,                # bytesOfKeyValueData
+    )
+    return identifier + fields + struct.pack("<I", data_size)
+
+
+def compress_spritesheet(input_path, output_path=None, fmt="bc3", container="dds"):
+    """
+    Block-compress a spritesheet PNG (as written by combine.create_spritesheet)
+    into a DDS or KTX file next to it. Returns the output path.
+    """
+    if container not in ("dds", "ktx"):
+        raise ValueError(f"Unknown container '{container}', expected 'dds' or 'ktx'.")
+    if container == "dds" and fmt in FORMATS and FORMATS[fmt][1] is None:
+        raise ValueError(f"DDS cannot hold {fmt.upper()} data, use the KTX container.")
+    if output_path is None:
+        output_path = os.path.splitext(input_path)[0] + "." + container
+
+    with Image.open(input_path) as img:
+        pixels = np.asarray(img.convert("RGBA"))
+    height, width, _ = pixels.shape
+
+    data = compress(pixels, fmt)
+    header = dds_header if container == "dds" else ktx_header
+    with open(output_path, "wb") as f:
+        f.write(header(width, height, fmt, len(data)))
+        f.write(data)
+
+    bits_per_pixel = FORMATS[fmt][0] * 8 / 16
+    print(f"Saved {output_path} ({fmt.upper()}, {bits_per_pixel:g} bpp, {len(data)} bytes)")
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Block-compresses spritesheet PNGs into GPU texture files (DDS or KTX).")
+    parser.add_argument("input_files", nargs="+", help="Spritesheet PNG files.")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="bc3",
+                        help="bc1 (4 bpp, 1-bit alpha), bc3 or etc2 (8 bpp, full alpha; "
+                             "etc2 needs --container ktx).")
+    parser.add_argument("--container", choices=["dds", "ktx"], default="dds")
+
+    args = parser.parse_args()
+    for input_file in args.input_files:
+        compress_spritesheet(input_file, fmt=args.format, container=args.container)
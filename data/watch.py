@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import json
+import os
+import time
+from PIL import Image
+
+from combine import create_spritesheet
+from slice import resolve_max_wing_width, slice_and_resize_butterfly
+from swirl import create_burst_sprites
+from writer import ImageWriter
+
+###############################################################################
+# Watch mode: keeps source art decoded in memory and rebuilds only the sheet
+# whose sources changed. Jobs come from a JSON config file, for example:
+#
+#   {
+#     "butterflies": [{"source": "suruvaippa_src.png", "frames": "suruvaippa",
+#                      "body_width": 40, "min_wing_width": 60,
+#                      "max_wing_width": "auto"}],
+#     "bubbles": [{"source": "bubbleA1.png", "frames": "popA1",
+#                  "frame_count": 10, "swirl_strength": 1.28}],
+#     "sheets": ["cat1"]
+#   }
+#
+# Butterfly and bubble jobs regenerate their frame folder from the source
+# image and then combine it; sheet jobs combine a folder of hand-made frames.
+# Besides the decoded sources, the Lanczos weights (slice.lanczos_taps) and
+# the burst swirl lookups (swirl.burst_geometry) stay cached between builds,
+# and the sheet is stacked from the frames in memory instead of reading
+# them back. Images are encoded with the "fast" preset by default.
+#
+# Every job may set "animation", "json" and "frame_prefix" for its sheet
+# metadata. The defaults are what the game loads: butterflies and sheets
+# get <frames>.json with a "fly" animation of <frames>_NN.png frames,
+# bubbles get <frames>_sprites.json with a "pop" animation of NN_break.png
+# frames (see app/game/entities/Bubble.ts).
+###############################################################################
+
+
+class SourceCache:
+    """Decoded RGBA source images, kept until the file changes on disk."""
+
+    def __init__(self):
+        self._images = {}
+
+    def get(self, path):
+        mtime = os.path.getmtime(path)
+        cached = self._images.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with Image.open(path) as img:
+            image = img.convert("RGBA")
+        self._images[path] = (mtime, image)
+        return image
+
+
+def load_jobs(config_path):
+    """Read the watch config into a flat list of job dicts with a 'kind' key."""
+    with open(config_path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    jobs = []
+    for job in config.get("butterflies", []):
+        jobs.append({"kind": "butterfly", **job})
+    for job in config.get("bubbles", []):
+        jobs.append({"kind": "bubble", **job})
+    for frames in config.get("sheets", []):
+        jobs.append({"kind": "sheet", "frames": frames})
+
+    for job in jobs:
+        # The sheet is written to <frames>.png, which must not be the source
+        if os.path.abspath(job.get("source", "")) == os.path.abspath(job["frames"] + ".png"):
+            raise ValueError(f"Source {job['source']} would be overwritten by its own sheet.")
+    return jobs
+
+
+def watched_files(job):
+    """Files whose changes trigger a rebuild of the job."""
+    if job["kind"] == "sheet":
+        return sorted(glob.glob(os.path.join(job["frames"], "*.png")))
+    return [job["source"]]
+
+
+def snapshot(job):
+    """Modification times of the watched files (missing files are skipped)."""
+    mtimes = {}
+    for path in watched_files(job):
+        try:
+            mtimes[path] = os.path.getmtime(path)
+        except FileNotFoundError:
+            pass
+    return mtimes
+
+
+def sheet_options(job):
+    """create_spritesheet keyword arguments for the metadata naming of a job."""
+    if job["kind"] == "bubble":
+        defaults = {"animation": "pop", "json": job["frames"] + "_sprites.json",
+                    "frame_prefix": ""}
+    else:
+        defaults = {"animation": "fly", "json": None, "frame_prefix": None}
+    options = {**defaults, **{key: job[key] for key in defaults if key in job}}
+    return {"animation_name": options["animation"], "json_path": options["json"],
+            "frame_prefix": options["frame_prefix"]}
+
+
+def build(job, cache, writer=None):
+    """Regenerate the frames of a job (if it has a source) and its spritesheet."""
+    frames = job["frames"]
+    options = sheet_options(job)
+
+    if job["kind"] == "butterfly":
+        source = cache.get(job["source"])
+        images = slice_and_resize_butterfly(
+            input_path=source,
+            body_width=job["body_width"],
+            min_wing_width=job["min_wing_width"],
+            max_wing_width=resolve_max_wing_width(
+                job["max_wing_width"], source, job["body_width"], job["min_wing_width"]),
+            output_dir=frames,
+            create_last_slices=job.get("create_last_slices", False),
+            writer=writer,
+        )
+        create_spritesheet(frames, writer=writer, images=images, **options)
+
+    elif job["kind"] == "bubble":
+        frame_count = job.get("frame_count", 10)
+        os.makedirs(frames, exist_ok=True)
+        images = create_burst_sprites(
+            input_image_path=cache.get(job["source"]),
+            output_folder=frames,
+            output_prefix="break",
+            frames=frame_count,
+            swirl_strength=job.get("swirl_strength", 1.28),
+            num_drops=job.get("num_drops", 5),
+            writer=writer,
+            separator="_",
+        )
+        create_spritesheet(frames, animation_frames=",".join(
+            f"{i + 1:02d}_break" for i in range(frame_count)),
+            writer=writer, images=images, **options)
+
+    else:
+        create_spritesheet(frames, writer=writer, **options)
+
+
+def try_build(job, cache, writer=None):
+    """
+    Build a job and report the outcome; a failure is printed instead of
+    raised so that one broken job does not stop the watch.
+    """
+    start = time.monotonic()
+    try:
+        build(job, cache, writer)
+    except Exception as e:
+        # Typically a file that is still being written, the next save retries
+        print(f"Building {job['frames']} failed: {type(e).__name__}: {e}")
+        return False
+    print(f"Built {job['frames']} in {time.monotonic() - start:.2f}s")
+    return True
+
+
+def watch(config_path, interval=0.2, debounce=0.3, initial_build=True,
+          preset="fast", workers=None):
+    """
+    Poll the sources of every job and rebuild the affected sheets once the
+    files have been quiet for `debounce` seconds, so a burst of saves causes
+    a single rebuild. Images are encoded with the writer preset `preset`.
+    """
+    jobs = load_jobs(config_path)
+    cache = SourceCache()
+    states = [snapshot(job) for job in jobs]
+
+    with ImageWriter(preset=preset, workers=workers) as writer:
+        _watch_loop(jobs, cache, states, writer, interval, debounce, initial_build)
+
+
+def _watch_loop(jobs, cache, states, writer, interval, debounce, initial_build):
+    if initial_build:
+        for job in jobs:
+            try_build(job, cache, writer)
+
+    print(f"Watching {len(jobs)} job(s), press Ctrl+C to stop.")
+    pending = set()
+    last_change = 0.0
+
+    while True:
+        time.sleep(interval)
+
+        for i, job in enumerate(jobs):
+            current = snapshot(job)
+            if current != states[i]:
+                states[i] = current
+                pending.add(i)
+                last_change = time.monotonic()
+
+        if not pending or time.monotonic() - last_change < debounce:
+            continue
+
+        for i in sorted(pending):
+            try_build(jobs[i], cache, writer)
+        pending.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Watches source art and rebuilds the affected spritesheets on change.")
+    parser.add_argument("config", help="JSON file listing butterflies, bubbles and sheets.")
+    parser.add_argument("--interval", type=float, default=0.2,
+                        help="Polling interval in seconds.")
+    parser.add_argument("--debounce", type=float, default=0.3,
+                        help="Quiet time in seconds before rebuilding.")
+    parser.add_argument("--no-initial-build", action="store_true",
+                        help="Only rebuild after the first change.")
+    parser.add_argument("--preset", choices=["fast", "default", "max"], default="fast",
+                        help="Image encoding preset (see writer.py).")
+
+    args = parser.parse_args()
+    try:
+        watch(args.config, args.interval, args.debounce,
+              initial_build=not args.no_initial_build, preset=args.preset)
+    except KeyboardInterrupt:
+        pass
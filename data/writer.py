@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from PIL import Image
+
+###############################################################################
+# Shared image output for the asset tools. Images are encoded on a thread
+# pool (zlib and libwebp release the GIL) with a speed/size preset:
+#
+#   fast     zlib level 1 / fastest lossless WebP, for iterating on art
+#   default  Pillow's defaults, what the tools always wrote
+#   max      optimize=True and the smallest of several zlib strategies /
+#            slowest lossless WebP, for release builds
+#
+# Pillow does not expose the PNG row filter choice, so "max" searches the
+# zlib strategies instead. Unless a format is chosen, every file is written
+# in the format its extension names; formats other than PNG and WebP use
+# Pillow's defaults, and images with alpha are flattened onto black for
+# formats without it (JPEG). Every written file is recorded with its size
+# and encode time.
+###############################################################################
+
+PNG_PRESETS = {
+    "fast": [{"compress_level": 1}],
+    "default": [{}],
+    # 0 = default strategy, 1 = filtered, 3 = run-length encoding
+    "max": [{"optimize": True, "compress_type": t} for t in (0, 1, 3)],
+}
+
+WEBP_PRESETS = {
+    "fast": {"lossless": True, "quality": 0, "method": 0},
+    "default": {"lossless": True},
+    "max": {"lossless": True, "quality": 100, "method": 6},
+}
+
+FORMATS = {"png": ".png", "webp": ".webp"}
+
+# Pillow formats that cannot store an alpha channel
+OPAQUE_FORMATS = {"jpeg", "ppm"}
+
+
+def format_of(path):
+    """Lower-case Pillow format name for the extension of path, e.g. 'jpeg'."""
+    image_format = Image.registered_extensions().get(os.path.splitext(path)[1].lower())
+    if image_format is None:
+        raise ValueError(f"Cannot tell the image format of '{path}' from its extension.")
+    return image_format.lower()
+
+
+def flatten(image):
+    """The image as RGB, composited onto black if it has transparency."""
+    if image.mode in ("RGB", "L"):
+        return image
+    background = Image.new("RGBA", image.size, (0, 0, 0, 255))
+    return Image.alpha_composite(background, image.convert("RGBA")).convert("RGB")
+
+
+def encode(image, image_format="png", preset="default"):
+    """Encode an image with a preset and return the bytes."""
+    if image_format == "webp":
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", **WEBP_PRESETS[preset])
+        return buffer.getvalue()
+    if image_format != "png":
+        if image_format in OPAQUE_FORMATS:
+            image = flatten(image)
+        buffer = io.BytesIO()
+        image.save(buffer, image_format.upper())
+        return buffer.getvalue()
+
+    best = None
+    for options in PNG_PRESETS[preset]:
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG", **options)
+        if best is None or buffer.tell() < len(best):
+            best = buffer.getvalue()
+    return best
+
+
+class ImageWriter:
+    """
+    Encodes and writes images in the background. Use as a context manager,
+    or call wait() before reading the files back and close() at the end.
+    The caller must not modify an image after passing it to save().
+    With image_format None every path keeps its extension and format;
+    'png' or 'webp' writes that format and changes the extension to match.
+    """
+
+    def __init__(self, preset="default", image_format=None, workers=None, report=False):
+        if preset not in PNG_PRESETS:
+            raise ValueError(f"Unknown preset '{preset}', expected one of {sorted(PNG_PRESETS)}.")
+        if image_format is not None and image_format not in FORMATS:
+            raise ValueError(f"Unknown format '{image_format}', expected one of {sorted(FORMATS)}.")
+        self.preset = preset
+        self.image_format = image_format
+        self.report = report
+        self.stats = []
+        self._pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count())
+        self._pending = []
+
+    def output_path(self, path):
+        """path, with the extension of the output format if one was chosen."""
+        if self.image_format is None:
+            return path
+        return os.path.splitext(path)[0] + FORMATS[self.image_format]
+
+    def _write(self, image, image_format, paths):
+        start = time.perf_counter()
+        data = encode(image, image_format, self.preset)
+        elapsed = time.perf_counter() - start
+        for path in paths:
+            with open(path, "wb") as f:
+                f.write(data)
+        return [{"path": path, "bytes": len(data), "seconds": elapsed if i == 0 else 0.0}
+                for i, path in enumerate(paths)]
+
+    def save(self, image, path, copies=()):
+        """
+        Queue an image for writing. The image is encoded once and the same
+        bytes are also written to every path in copies. Returns the path
+        actually written.
+        """
+        paths = [self.output_path(p) for p in (path, *copies)]
+        image_format = self.image_format or format_of(paths[0])
+        for other in paths[1:]:
+            if (self.image_format or format_of(other)) != image_format:
+                raise ValueError(f"Copy '{other}' does not have the format of '{paths[0]}'.")
+        self._pending.append(self._pool.submit(self._write, image, image_format, paths))
+        return paths[0]
+
+    def wait(self):
+        """Block until every queued image is written; re-raises encode errors."""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            self.stats.extend(future.result())
+
+    def close(self):
+        self.wait()
+        self._pool.shutdown()
+        if self.report:
+            self.print_report()
+
+    def print_report(self):
+        for stat in self.stats:
+            print(f"  {stat['path']}: {stat['bytes'] / 1024:.1f} kB, "
+                  f"encoded in {stat['seconds'] * 1000:.0f} ms")
+        total_bytes = sum(stat["bytes"] for stat in self.stats)
+        total_seconds = sum(stat["seconds"] for stat in self.stats)
+        print(f"Wrote {len(self.stats)} file(s), {total_bytes / 1024:.1f} kB, "
+              f"{total_seconds:.2f}s of encoding "
+              f"({self.image_format or 'format by extension'}, {self.preset})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+@contextmanager
+def use_writer(writer=None):
+    """
+    Yield the given writer, waiting for its files on exit, or a default
+    ImageWriter that is closed on exit. Tools wrap their saving in this so
+    every file is on disk when they return.
+    """
+    if writer is None:
+        with ImageWriter() as default_writer:
+            yield default_writer
+    else:
+        yield writer
+        writer.wait()